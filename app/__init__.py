@@ -2,24 +2,55 @@ from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_login import LoginManager
+from flask_caching import Cache
+from app.replicas import RoutingSession
 from config import config
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 login_manager.login_message_category = 'info'
+cache = Cache()
 
 def create_app(config_name='default'):
     """Application factory function."""
     app = Flask(__name__)
     app.config.from_object(config[config_name])
 
+    from app.json_provider import init_json_provider
+    init_json_provider(app)
+
+    # Registered first so its after_request hook runs last, on the final body
+    from app import assets, compression, prerender
+    compression.init_app(app)
+    assets.init_app(app)
+    prerender.init_app(app)
+
     # Initialize extensions with app
+    from app.engines import engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'], app.config)
     db.init_app(app)
-    migrate.init_app(app, db)
+    from app import replicas, sqlite
+    sqlite.init_app(app, db)
+    replicas.init_app(app)
+    from app.search import include_name
+    migrate.init_app(app, db, include_name=include_name)
     login_manager.init_app(app)
+    cache.init_app(app)
+    from app.caching import check_backend, user_fragment_key
+    check_backend(app)
+    # Keys {% cache %} fragments by user, e.g. {% cache 300, 'navbar', user_fragment_key() %}
+    app.add_template_global(user_fragment_key)
+    from app import entity_cache, identity
+    identity.init_app(app)
+    entity_cache.init_app(app)
+
+    from app import instrumentation, metrics
+    instrumentation.init_app(app)
+    metrics.init_app(app)
 
     # Register blueprints
     from app.main import bp as main_bp
@@ -37,4 +68,4 @@ def create_app(config_name='default'):
     return app
 
 # Import models to ensure they are registered with SQLAlchemy
-from app import models
+from app import models, search
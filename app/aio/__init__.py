@@ -0,0 +1,139 @@
+"""
+Asyncio variant of the /api/v1 API, served by an ASGI server.
+
+The handlers use the same User and Post models and serializers as the Flask
+API, through SQLAlchemy's async engine: aiosqlite for SQLite and asyncpg for
+PostgreSQL. Responses match the Flask API's. It covers token issue, post
+reads and writes and the post and user collections; response caching, ETags,
+read replicas and query instrumentation remain Flask-only.
+
+Usage:
+    uvicorn asgi:app --workers 4
+"""
+import contextlib
+import json
+from urllib.parse import urlencode
+from flask import Config
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from starlette.applications import Starlette
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.routing import Mount
+from werkzeug.http import HTTP_STATUS_CODES
+from app.api.auth import make_token_serializer
+from app.api.serializers import build_link_template
+from app.engines import engine_options
+from app.json_provider import orjson
+from config import basedir, config
+
+# Async driver for each database backend
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+def async_database_url(url):
+    """
+    Return the async-driver equivalent of a database URL.
+
+    Args:
+        url (str): SQLALCHEMY_DATABASE_URI, e.g. 'postgresql://...'
+
+    Returns:
+        URL: The same database with its async driver, e.g. 'postgresql+asyncpg://...'
+
+    Raises:
+        ValueError: If the backend has no supported async driver
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver for {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+def create_engine(settings):
+    """Create the async engine for the configured database."""
+    url = settings['ASYNC_DATABASE_URL'] or async_database_url(settings['SQLALCHEMY_DATABASE_URI'])
+    engine = create_async_engine(url, **engine_options(url, settings))
+    if settings['SQLITE_TUNING']:
+        from app.sqlite import tune_engine
+        # The write queue waits on a thread lock, which would block the event loop
+        tune_engine(engine.sync_engine, {**settings, 'SQLITE_WRITE_QUEUE': False})
+    return engine
+
+def json_dumps(settings):
+    """Return the JSON encoder to use: orjson when enabled and installed."""
+    if settings['JSON_FAST_ENCODER'] and orjson is not None:
+        return lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return lambda obj: json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def jsonify(request, payload, status_code=200, headers=None):
+    """Create a JSON response with the application's encoder."""
+    return Response(request.app.state.json_dumps(payload), status_code=status_code,
+                    headers=headers, media_type='application/json')
+
+def error_response(request, status_code, message=None, headers=None):
+    """Create a JSON error response with the given status code and message."""
+    payload = {'error': HTTP_STATUS_CODES.get(status_code, 'Unknown error')}
+    if message:
+        payload['message'] = message
+    return jsonify(request, payload, status_code, headers)
+
+async def http_error(request, exc):
+    """Return unmatched routes and methods as JSON errors, like the Flask API."""
+    return error_response(request, exc.status_code, headers=exc.headers)
+
+def url_for(request, name, query=None, **path_params):
+    """
+    Return the path of a route, like Flask's url_for.
+
+    Args:
+        request: Current request
+        name (str): Route name, e.g. 'api.get_posts'
+        query (dict): Query string arguments; None values are left out
+        **path_params: Route parameters
+
+    Returns:
+        str: Path and query string
+    """
+    path = str(request.app.url_path_for(name, **path_params))
+    args = urlencode({key: value for key, value in (query or {}).items() if value is not None})
+    return path + '?' + args if args else path
+
+def link_resolver(app):
+    """Return the serializers' link template resolver for this application."""
+    templates = {}
+
+    def resolve(endpoint, param=None):
+        template = templates.get((endpoint, param))
+        if template is None:
+            template = templates[(endpoint, param)] = build_link_template(
+                lambda name, **params: str(app.url_path_for(name, **params)), endpoint, param)
+        return template
+
+    return resolve
+
+def create_asgi_app(config_name='default'):
+    """Application factory function."""
+    settings = Config(basedir)
+    settings.from_object(config[config_name])
+    engine = create_engine(settings)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        await engine.dispose()
+
+    from app.aio.api import routes
+    app = Starlette(debug=settings.get('DEBUG', False),
+                    routes=[Mount('/api/v1', routes=routes)],
+                    exception_handlers={HTTPException: http_error},
+                    lifespan=lifespan)
+    app.state.config = settings
+    app.state.engine = engine
+    app.state.sessions = async_sessionmaker(engine, expire_on_commit=False)
+    app.state.resolve_link = link_resolver(app)
+    app.state.json_dumps = json_dumps(settings)
+    app.state.tokens = make_token_serializer(settings['SECRET_KEY'])
+    return app
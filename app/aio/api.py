@@ -0,0 +1,244 @@
+"""Async handlers for the /api/v1 endpoints served by the ASGI application."""
+import base64
+import binascii
+from itsdangerous import BadSignature
+from sqlalchemy import select, tuple_
+from starlette.concurrency import run_in_threadpool
+from starlette.routing import Route
+from app.aio import error_response, jsonify, url_for
+from app.api.pagination import CursorError, decode_cursor, encode_cursor
+from app.api.serializers import (POST_ITEM_LINKS, USER_ITEM_LINKS, USER_SUMMARY_FIELDS,
+                                 post_serializer, user_serializer)
+from app.models import Post, User
+
+def get_page_limit(request):
+    """Return the requested page size, clamped to the configured maximum."""
+    settings = request.app.state.config
+    try:
+        limit = int(request.query_params['limit'])
+    except (KeyError, ValueError):
+        limit = settings['API_PAGE_SIZE']
+    return max(1, min(limit, settings['API_MAX_PAGE_SIZE']))
+
+async def keyset_paginate(session, statement, columns, after=None, limit=20):
+    """
+    Return one page of a select() ordered by the given columns.
+
+    The async counterpart of app.api.pagination.keyset_paginate; cursors are
+    interchangeable between the two.
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page
+
+    Raises:
+        CursorError: If `after` is not a valid cursor for these columns
+    """
+    if after:
+        statement = statement.where(tuple_(*columns) > decode_cursor(after, columns))
+    rows = (await session.scalars(statement.order_by(*columns).limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+    return rows, next_cursor
+
+async def authenticate(request, session, tokens=True):
+    """
+    Identify the user from the request's Authorization header.
+
+    Basic credentials are always accepted, bearer tokens if `tokens` is set.
+    Password checks run in a worker thread so the event loop keeps serving.
+
+    Returns:
+        tuple: (user, None) on success, or (None, 401 response)
+    """
+    scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+    scheme = scheme.lower()
+    if tokens and scheme == 'bearer':
+        settings = request.app.state.config
+        try:
+            user_id = request.app.state.tokens.loads(
+                credentials, max_age=settings['API_TOKEN_EXPIRATION'])
+        except BadSignature:
+            user_id = None
+        user = None if user_id is None else await session.get(User, user_id)
+        if user is None:
+            return None, error_response(request, 401, 'Invalid token', headers={
+                'WWW-Authenticate': 'Bearer realm="Authentication Required"'})
+        return user, None
+
+    user = None
+    if scheme == 'basic':
+        try:
+            username, _, password = base64.b64decode(credentials).decode('utf-8').partition(':')
+        except (binascii.Error, UnicodeDecodeError):
+            username = password = None
+        if username is not None:
+            user = await session.scalar(select(User).filter_by(username=username).limit(1))
+        if user is not None and not await run_in_threadpool(user.check_password, password):
+            user = None
+    if user is None:
+        return None, error_response(request, 401, 'Invalid credentials', headers={
+            'WWW-Authenticate': 'Basic realm="Authentication Required"'})
+    return user, None
+
+async def get_token(request):
+    """Issue a signed bearer token for the authenticated user."""
+    async with request.app.state.sessions() as session:
+        user, error = await authenticate(request, session, tokens=False)
+    if error is not None:
+        return error
+    return jsonify(request, {
+        'token': request.app.state.tokens.dumps(user.id),
+        'expires_in': request.app.state.config['API_TOKEN_EXPIRATION']
+    }, 201)
+
+async def get_posts(request):
+    """Return a page of posts ordered by creation time."""
+    limit = get_page_limit(request)
+    after = request.query_params.get('after')
+    async with request.app.state.sessions() as session:
+        try:
+            posts, next_cursor = await keyset_paginate(
+                session, select(Post), [Post.created_at, Post.id], after=after, limit=limit)
+        except CursorError:
+            return error_response(request, 400, 'Invalid cursor')
+    fields = post_serializer.select(request.query_params.get('fields'))
+    return jsonify(request, {
+        'items': post_serializer.dump_many(posts, fields, POST_ITEM_LINKS,
+                                           request.app.state.resolve_link),
+        '_meta': {
+            'limit': limit,
+            'next_cursor': next_cursor
+        },
+        '_links': {
+            'self': url_for(request, 'api.get_posts', {'limit': limit, 'after': after}),
+            'next': url_for(request, 'api.get_posts', {'limit': limit, 'after': next_cursor})
+            if next_cursor else None
+        }
+    })
+
+async def get_post(request):
+    """Return a post."""
+    id = request.path_params['id']
+    async with request.app.state.sessions() as session:
+        post = await session.get(Post, id)
+    if post is None:
+        return error_response(request, 404, f"Post with id {id} not found")
+    return jsonify(request, post_serializer.dump(
+        post, post_serializer.select(request.query_params.get('fields')),
+        resolve=request.app.state.resolve_link))
+
+async def create_post(request):
+    """Create a new post."""
+    async with request.app.state.sessions() as session:
+        _, error = await authenticate(request, session)
+        if error is not None:
+            return error
+        try:
+            data = await request.json() or {}
+        except ValueError:
+            data = {}
+        if 'title' not in data or 'content' not in data or 'user_id' not in data:
+            return error_response(request, 400, 'Must include title, content and user_id fields')
+
+        # Verify user exists
+        if await session.get(User, data['user_id']) is None:
+            return error_response(request, 400, 'Invalid user_id')
+
+        post = Post(
+            title=data['title'],
+            content=data['content'],
+            user_id=data['user_id']
+        )
+        session.add(post)
+        await session.commit()
+        await session.refresh(post)
+
+    return jsonify(request, post_serializer.dump(
+        post, links=POST_ITEM_LINKS, resolve=request.app.state.resolve_link), 201, {
+        'Location': url_for(request, 'api.get_post', id=post.id)
+    })
+
+async def get_users(request):
+    """Return a page of users."""
+    limit = get_page_limit(request)
+    after = request.query_params.get('after')
+    async with request.app.state.sessions() as session:
+        _, error = await authenticate(request, session)
+        if error is not None:
+            return error
+        try:
+            users, next_cursor = await keyset_paginate(
+                session, select(User), [User.id], after=after, limit=limit)
+        except CursorError:
+            return error_response(request, 400, 'Invalid cursor')
+    fields = user_serializer.select(request.query_params.get('fields'), USER_SUMMARY_FIELDS)
+    return jsonify(request, {
+        'items': user_serializer.dump_many(users, fields, USER_ITEM_LINKS,
+                                           request.app.state.resolve_link),
+        '_meta': {
+            'limit': limit,
+            'next_cursor': next_cursor
+        },
+        '_links': {
+            'self': url_for(request, 'api.get_users', {'limit': limit, 'after': after}),
+            'next': url_for(request, 'api.get_users', {'limit': limit, 'after': next_cursor})
+            if next_cursor else None
+        }
+    })
+
+async def get_user(request):
+    """Return a user."""
+    id = request.path_params['id']
+    async with request.app.state.sessions() as session:
+        _, error = await authenticate(request, session)
+        if error is not None:
+            return error
+        user = await session.get(User, id)
+    if user is None:
+        return error_response(request, 404, f"User with id {id} not found")
+    return jsonify(request, user_serializer.dump(
+        user, user_serializer.select(request.query_params.get('fields')),
+        resolve=request.app.state.resolve_link))
+
+async def get_user_posts(request):
+    """Return a page of a user's posts ordered by creation time."""
+    id = request.path_params['id']
+    limit = get_page_limit(request)
+    after = request.query_params.get('after')
+    async with request.app.state.sessions() as session:
+        if await session.get(User, id) is None:
+            return error_response(request, 404, f"User with id {id} not found")
+        try:
+            posts, next_cursor = await keyset_paginate(
+                session, select(Post).where(Post.user_id == id), [Post.created_at, Post.id],
+                after=after, limit=limit)
+        except CursorError:
+            return error_response(request, 400, 'Invalid cursor')
+    fields = post_serializer.select(request.query_params.get('fields'))
+    return jsonify(request, {
+        'items': post_serializer.dump_many(posts, fields, POST_ITEM_LINKS,
+                                           request.app.state.resolve_link),
+        '_meta': {
+            'limit': limit,
+            'next_cursor': next_cursor
+        },
+        '_links': {
+            'self': url_for(request, 'api.get_user_posts', {'limit': limit, 'after': after}, id=id),
+            'next': url_for(request, 'api.get_user_posts', {'limit': limit, 'after': next_cursor},
+                            id=id)
+            if next_cursor else None,
+            'author': url_for(request, 'api.get_user', id=id)
+        }
+    })
+
+routes = [
+    Route('/tokens', get_token, methods=['POST'], name='api.get_token'),
+    Route('/posts', get_posts, methods=['GET'], name='api.get_posts'),
+    Route('/posts', create_post, methods=['POST'], name='api.create_post'),
+    Route('/posts/{id:int}', get_post, methods=['GET'], name='api.get_post'),
+    Route('/users', get_users, methods=['GET'], name='api.get_users'),
+    Route('/users/{id:int}', get_user, methods=['GET'], name='api.get_user'),
+    Route('/users/{id:int}/posts', get_user_posts, methods=['GET'], name='api.get_user_posts'),
+]
@@ -2,4 +2,4 @@ from flask import Blueprint
 
 bp = Blueprint('api', __name__, url_prefix='/api/v1')
 
-from app.api import users, posts, errors, auth
+from app.api import users, posts, errors, auth, tokens, conditional
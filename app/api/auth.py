@@ -1,11 +1,30 @@
-from flask import g
-from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth
-from app import db
+import hashlib
+from flask import current_app, g
+from flask_httpauth import HTTPBasicAuth, HTTPTokenAuth, MultiAuth
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from app import entity_cache
 from app.models import User
 from app.api.errors import unauthorized
 
 basic_auth = HTTPBasicAuth()
 token_auth = HTTPTokenAuth()
+multi_auth = MultiAuth(basic_auth, token_auth)
+
+def make_token_serializer(secret_key):
+    """Return the serializer that signs and verifies API tokens with secret_key."""
+    return URLSafeTimedSerializer(
+        secret_key,
+        salt='api-token',
+        signer_kwargs={'digest_method': hashlib.sha256}
+    )
+
+def _token_serializer():
+    """Return the serializer used to sign and verify API tokens."""
+    return make_token_serializer(current_app.config['SECRET_KEY'])
+
+def generate_token(user):
+    """Return a signed bearer token identifying the given user."""
+    return _token_serializer().dumps(user.id)
 
 @basic_auth.verify_password
 def verify_password(username, password):
@@ -23,13 +42,23 @@ def basic_auth_error():
 
 @token_auth.verify_token
 def verify_token(token):
-    """Verify authentication token."""
-    # In a real application, you would implement token-based authentication here
-    # For simplicity, we'll just use basic auth for now
-    if token == 'test-token':
-        g.current_user = db.session.get(User, 1)  # Use the first user for testing
-        return True
-    return False
+    """
+    Verify a bearer token issued by POST /api/v1/tokens.
+
+    Only the HMAC signature and timestamp are checked, so no password
+    hashing takes place; the user is then loaded by primary key, usually
+    from the entity cache.
+    """
+    try:
+        user_id = _token_serializer().loads(
+            token, max_age=current_app.config['API_TOKEN_EXPIRATION'])
+    except BadSignature:
+        return False
+    user = entity_cache.get(User, user_id)
+    if user is None:
+        return False
+    g.current_user = user
+    return True
 
 @token_auth.error_handler
 def token_auth_error():
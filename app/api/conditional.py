@@ -0,0 +1,52 @@
+"""Conditional request support (ETag / Last-Modified) for API resources."""
+from flask import make_response, request
+from werkzeug.http import is_resource_modified
+from app.api import bp
+from app.api.errors import precondition_failed
+
+def etag_for(resource):
+    """Return the strong entity tag of a versioned model instance."""
+    return f'{resource.__tablename__}-{resource.id}-v{resource.version}'
+
+def set_validators(response, resource):
+    """Attach the ETag and Last-Modified headers of resource to response."""
+    response.set_etag(etag_for(resource))
+    response.last_modified = resource.updated_at
+    return response
+
+def not_modified(resource):
+    """
+    Return a 304 response if the client's cached copy is still current.
+
+    Checks If-None-Match (and If-Modified-Since when no entity tag was sent)
+    before anything is serialized, so an unchanged resource costs one row read.
+
+    Returns:
+        Response or None: A 304 response, or None if the body must be sent
+    """
+    if is_resource_modified(request.environ, etag=etag_for(resource),
+                            last_modified=resource.updated_at):
+        return None
+    return set_validators(make_response('', 304), resource)
+
+def check_if_match(resource):
+    """
+    Enforce an If-Match precondition before modifying resource.
+
+    Tags are compared weakly: compressed responses carry the weak form of
+    the resource's tag, which names the same version.
+
+    Returns:
+        Response or None: A 412 response if the client's version is stale
+    """
+    if request.if_match and not request.if_match.contains_weak(etag_for(resource)):
+        return precondition_failed('Resource has been modified')
+    return None
+
+@bp.after_request
+def make_conditional(response):
+    """Turn cached 200 responses into 304s when the client copy is current."""
+    if request.method in ('GET', 'HEAD') and response.status_code == 200 \
+            and 'ETag' in response.headers:
+        response.make_conditional(request)
+    return response
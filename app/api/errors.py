@@ -26,6 +26,10 @@ def not_found(message):
     """404 Not Found response."""
     return error_response(404, message)
 
+def precondition_failed(message):
+    """412 Precondition Failed response."""
+    return error_response(412, message)
+
 def internal_server_error(message):
     """500 Internal Server Error response."""
     return error_response(500, message)
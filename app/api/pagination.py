@@ -0,0 +1,77 @@
+"""Keyset (cursor) pagination helpers for API collections."""
+import base64
+import binascii
+import json
+from datetime import datetime
+from flask import current_app, request
+from sqlalchemy import tuple_
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(values):
+    """Encode a tuple of column values into an opaque, URL-safe cursor."""
+    payload = json.dumps(
+        [v.isoformat() if isinstance(v, datetime) else v for v in values],
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Decode a cursor produced by encode_cursor back into column values."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError('cursor does not match the sort key')
+        return tuple(_coerce(column, value) for column, value in zip(columns, values))
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise CursorError('Invalid cursor') from e
+
+
+def _coerce(column, value):
+    """Convert a JSON cursor value to the Python type of its column."""
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is int and (not isinstance(value, int) or isinstance(value, bool)):
+        raise ValueError('expected an integer cursor value')
+    return value
+
+
+def get_page_limit():
+    """Return the requested page size, clamped to the configured maximum."""
+    limit = request.args.get('limit', current_app.config['API_PAGE_SIZE'], type=int)
+    return max(1, min(limit, current_app.config['API_MAX_PAGE_SIZE']))
+
+
+def keyset_paginate(query, columns, after=None, limit=20):
+    """
+    Return one page of query results ordered by the given columns.
+
+    The page starts strictly after the row identified by the `after` cursor,
+    so each page is a bounded range scan over an index on `columns`.
+
+    Args:
+        query: SQLAlchemy query (or dynamic relationship) to paginate
+        columns (list): Sort key columns; the last one must be unique
+        after (str): Cursor returned with the previous page, if any
+        limit (int): Maximum number of rows to return
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page
+
+    Raises:
+        CursorError: If `after` is not a valid cursor for these columns
+    """
+    if after:
+        query = query.filter(tuple_(*columns) > decode_cursor(after, columns))
+    rows = query.order_by(*columns).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([getattr(rows[-1], column.key) for column in columns])
+    return rows, next_cursor
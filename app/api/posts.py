@@ -1,54 +1,102 @@
-from flask import jsonify, request, url_for
-from app import db
+import json
+from flask import current_app, jsonify, request, url_for
+from sqlalchemy import insert, select
+from sqlalchemy.orm.exc import StaleDataError
+from app import cache, db, entity_cache
+from app.caching import invalidate, is_ok, namespace_key
 from app.models import Post, User
+from app.search import search_posts
 from app.api import bp
-from app.api.errors import bad_request, not_found
-from app.api.auth import basic_auth
+from app.api.errors import bad_request, not_found, precondition_failed
+from app.api.conditional import check_if_match, not_modified, set_validators
+from app.api.serializers import POST_ITEM_LINKS, post_serializer
+from app.api.auth import multi_auth
+from app.api.pagination import CursorError, get_page_limit, keyset_paginate
+
+def post_cache_key(id):
+    """Return the cache key of the get_post response for a post."""
+    return f'view/post/{id}'
+
+def invalidate_post_cache(*ids):
+    """Drop cached post lists and the cached responses of the given posts."""
+    invalidate('posts')
+    if ids:
+        cache.delete_many(*(post_cache_key(id) for id in ids))
 
 @bp.route('/posts', methods=['GET'])
+@cache.cached(make_cache_key=namespace_key('posts'), response_filter=is_ok)
 def get_posts():
-    """Return list of all posts."""
-    posts = Post.query.all()
-    return jsonify([{
-        'id': post.id,
-        'title': post.title,
-        'content': post.content,
-        'created_at': post.created_at.isoformat() + 'Z',
-        'user_id': post.user_id,
+    """Return a page of posts ordered by creation time."""
+    limit = get_page_limit()
+    after = request.args.get('after')
+    try:
+        posts, next_cursor = keyset_paginate(
+            Post.query, [Post.created_at, Post.id], after=after, limit=limit)
+    except CursorError:
+        return bad_request('Invalid cursor')
+    fields = post_serializer.select(request.args.get('fields'))
+    return jsonify({
+        'items': post_serializer.dump_many(posts, fields, POST_ITEM_LINKS),
+        '_meta': {
+            'limit': limit,
+            'next_cursor': next_cursor
+        },
         '_links': {
-            'self': url_for('api.get_post', id=post.id),
-            'author': url_for('api.get_user', id=post.user_id)
+            'self': url_for('api.get_posts', limit=limit, after=after),
+            'next': url_for('api.get_posts', limit=limit, after=next_cursor)
+            if next_cursor else None
         }
-    } for post in posts])
+    })
+
+@bp.route('/posts/search', methods=['GET'])
+@cache.cached(make_cache_key=namespace_key('posts'), response_filter=is_ok)
+def search():
+    """Return a page of posts matching ?q=, best matches first."""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return bad_request('Must include a search query')
+    limit = get_page_limit()
+    page = max(1, request.args.get('page', 1, type=int))
+    posts = search_posts(q, limit + 1, offset=(page - 1) * limit)
+    has_next = len(posts) > limit
+    fields = post_serializer.select(request.args.get('fields'))
+    return jsonify({
+        'items': post_serializer.dump_many(posts[:limit], fields, POST_ITEM_LINKS),
+        '_meta': {
+            'page': page,
+            'limit': limit
+        },
+        '_links': {
+            'self': url_for('api.search', q=q, limit=limit, page=page),
+            'next': url_for('api.search', q=q, limit=limit, page=page + 1)
+            if has_next else None
+        }
+    })
 
 @bp.route('/posts/<int:id>', methods=['GET'])
+@cache.cached(make_cache_key=post_cache_key, response_filter=is_ok,
+              unless=lambda: 'fields' in request.args)
 def get_post(id):
     """Return a post."""
-    post = db.session.get(Post, id)
+    post = entity_cache.get(Post, id)
     if post is None:
         return not_found(f"Post with id {id} not found")
-    return jsonify({
-        'id': post.id,
-        'title': post.title,
-        'content': post.content,
-        'created_at': post.created_at.isoformat() + 'Z',
-        'user_id': post.user_id,
-        '_links': {
-            'self': url_for('api.get_post', id=post.id),
-            'author': url_for('api.get_user', id=post.user_id),
-            'posts': url_for('api.get_posts')
-        }
-    })
+    response = not_modified(post)
+    if response is not None:
+        return response
+    response = jsonify(post_serializer.dump(
+        post, post_serializer.select(request.args.get('fields'))))
+    return set_validators(response, post)
 
 @bp.route('/posts', methods=['POST'])
-@basic_auth.login_required
+@multi_auth.login_required
 def create_post():
     """Create a new post."""
     data = request.get_json() or {}
     if 'title' not in data or 'content' not in data or 'user_id' not in data:
         return bad_request('Must include title, content and user_id fields')
 
-    # Verify user exists
+    # Verify user exists; not from the entity cache, which may lag a delete
     user = db.session.get(User, data['user_id'])
     if user is None:
         return bad_request('Invalid user_id')
@@ -60,29 +108,111 @@ def create_post():
     )
     db.session.add(post)
     db.session.commit()
+    invalidate_post_cache()
 
-    response = jsonify({
-        'id': post.id,
-        'title': post.title,
-        'content': post.content,
-        'created_at': post.created_at.isoformat() + 'Z',
-        'user_id': post.user_id,
-        '_links': {
-            'self': url_for('api.get_post', id=post.id),
-            'author': url_for('api.get_user', id=post.user_id)
-        }
-    })
+    response = jsonify(post_serializer.dump(post, links=POST_ITEM_LINKS))
     response.status_code = 201
     response.headers['Location'] = url_for('api.get_post', id=post.id)
+    return set_validators(response, post)
+
+@bp.route('/posts/batch', methods=['POST'])
+@multi_auth.login_required
+def create_posts_batch():
+    """
+    Create many posts in a single transaction.
+
+    Accepts a JSON array of post objects, or one JSON object per line with
+    Content-Type application/x-ndjson. Items are validated individually; all
+    valid items are inserted with one executemany and each input item gets a
+    result entry in the response, in input order.
+    """
+    items = _read_batch_items()
+    if items is None:
+        return bad_request('Request body must be a JSON array or NDJSON')
+    if len(items) > current_app.config['API_MAX_BATCH_SIZE']:
+        return bad_request(
+            f"Batch exceeds {current_app.config['API_MAX_BATCH_SIZE']} items")
+
+    results = [None] * len(items)
+    valid = []
+    for index, data in enumerate(items):
+        if not isinstance(data, dict) or 'title' not in data or \
+                'content' not in data or 'user_id' not in data:
+            results[index] = _batch_error(index, 'Must include title, content and user_id fields')
+        elif not isinstance(data['user_id'], int) or isinstance(data['user_id'], bool):
+            results[index] = _batch_error(index, 'Invalid user_id')
+        else:
+            valid.append((index, data))
+
+    # Check every referenced author with one IN query
+    user_ids = {data['user_id'] for _, data in valid}
+    known_ids = set(db.session.scalars(
+        select(User.id).where(User.id.in_(user_ids)))) if user_ids else set()
+    rows = []
+    for index, data in valid:
+        if data['user_id'] not in known_ids:
+            results[index] = _batch_error(index, 'Invalid user_id')
+        else:
+            rows.append((index, {
+                'title': data['title'],
+                'content': data['content'],
+                'user_id': data['user_id']
+            }))
+
+    if rows:
+        ids = db.session.scalars(
+            insert(Post).returning(Post.id, sort_by_parameter_order=True),
+            [row for _, row in rows]
+        ).all()
+        db.session.commit()
+        invalidate_post_cache()
+        for (index, _), id in zip(rows, ids):
+            results[index] = {
+                'index': index,
+                'status': 201,
+                'id': id,
+                '_links': {
+                    'self': url_for('api.get_post', id=id)
+                }
+            }
+
+    response = jsonify({
+        'created': len(rows),
+        'failed': len(items) - len(rows),
+        'results': results
+    })
+    response.status_code = 201 if len(rows) == len(items) else 207
     return response
 
+def _read_batch_items():
+    """Parse a batch request body into a list, or return None if malformed."""
+    if request.mimetype == 'application/x-ndjson':
+        items = []
+        for line in request.get_data(as_text=True).splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)  # Reported as an invalid item
+        return items
+    data = request.get_json(silent=True)
+    return data if isinstance(data, list) else None
+
+def _batch_error(index, message):
+    """Result entry for a batch item that was rejected."""
+    return {'index': index, 'status': 400, 'message': message}
+
 @bp.route('/posts/<int:id>', methods=['PUT'])
-@basic_auth.login_required
+@multi_auth.login_required
 def update_post(id):
     """Update a post."""
     post = db.session.get(Post, id)
     if post is None:
         return not_found(f"Post with id {id} not found")
+    response = check_if_match(post)
+    if response is not None:
+        return response
     data = request.get_json() or {}
 
     if 'title' in data:
@@ -90,21 +220,17 @@ def update_post(id):
     if 'content' in data:
         post.content = data['content']
 
-    db.session.commit()
-    return jsonify({
-        'id': post.id,
-        'title': post.title,
-        'content': post.content,
-        'created_at': post.created_at.isoformat() + 'Z',
-        'user_id': post.user_id,
-        '_links': {
-            'self': url_for('api.get_post', id=post.id),
-            'author': url_for('api.get_user', id=post.user_id)
-        }
-    })
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return precondition_failed('Resource has been modified')
+    invalidate_post_cache(post.id)
+    response = jsonify(post_serializer.dump(post, links=POST_ITEM_LINKS))
+    return set_validators(response, post)
 
 @bp.route('/posts/<int:id>', methods=['DELETE'])
-@basic_auth.login_required
+@multi_auth.login_required
 def delete_post(id):
     """Delete a post."""
     post = db.session.get(Post, id)
@@ -112,4 +238,5 @@ def delete_post(id):
         return not_found(f"Post with id {id} not found")
     db.session.delete(post)
     db.session.commit()
+    invalidate_post_cache(id)
     return '', 204
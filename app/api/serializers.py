@@ -0,0 +1,174 @@
+"""
+Serializers that turn model instances into API representations.
+
+Each Serializer compiles, once per combination of fields and links, a
+function that builds the whole dict in a single expression, and resolves
+link URLs from templates built with one url_for call per endpoint instead of
+one per item.
+"""
+from flask import current_app, has_request_context, request, url_for
+
+# Placeholder id used to turn a URL rule into a prefix/suffix template
+_LINK_PLACEHOLDER = 987654321
+
+def isoformat(value):
+    """Format a naive UTC datetime the way the API always has."""
+    return None if value is None else value.isoformat() + 'Z'
+
+def build_link_template(url_for, endpoint, param=None):
+    """
+    Build the (prefix, suffix) template of an endpoint with a URL builder.
+
+    Args:
+        url_for (callable): Called as url_for(endpoint, **params) to build a URL
+        endpoint (str): Endpoint name, e.g. 'api.get_post'
+        param (str): Name of the URL parameter, or None for a fixed URL
+
+    Returns:
+        tuple: (prefix, suffix); suffix is None for fixed URLs
+    """
+    if param is None:
+        return (url_for(endpoint), None)
+    url = url_for(endpoint, **{param: _LINK_PLACEHOLDER})
+    prefix, _, suffix = url.partition(str(_LINK_PLACEHOLDER))
+    return (prefix, suffix)
+
+def link_template(endpoint, param=None):
+    """
+    Return a (prefix, suffix) template for the URLs of an endpoint.
+
+    For an endpoint taking one parameter, prefix + str(value) + suffix equals
+    url_for(endpoint, **{param: value}). Templates are cached per application
+    and script root.
+
+    Args:
+        endpoint (str): Endpoint name, e.g. 'api.get_post'
+        param (str): Name of the URL parameter, or None for a fixed URL
+
+    Returns:
+        tuple: (prefix, suffix); suffix is None for fixed URLs
+    """
+    templates = current_app.extensions.setdefault('link_templates', {})
+    script_root = request.script_root if has_request_context() else ''
+    key = (endpoint, param, script_root)
+    template = templates.get(key)
+    if template is None:
+        template = templates[key] = build_link_template(url_for, endpoint, param)
+    return template
+
+class Serializer:
+    """Compiles and applies the representation of one model."""
+
+    def __init__(self, fields, links):
+        """
+        Args:
+            fields (dict): Field name -> formatter, or None to copy the attribute
+            links (dict): Link name -> (endpoint, (url parameter, attribute)),
+                or (endpoint, None) for a link without parameters
+        """
+        self.fields = fields
+        self.links = links
+        self._compiled = {}
+
+    def select(self, requested, default=None):
+        """
+        Resolve a comma-separated ?fields= value into field names.
+
+        Unknown names are ignored and 'id' is always included.
+
+        Returns:
+            tuple: Field names in definition order, or default if none requested
+        """
+        if not requested:
+            return default
+        wanted = set(requested.split(',')) | {'id'}
+        return tuple(name for name in self.fields if name in wanted)
+
+    def dump(self, obj, fields=None, links=None, resolve=link_template):
+        """Return the representation of a single object."""
+        return self.dump_many((obj,), fields, links, resolve)[0]
+
+    def dump_many(self, objs, fields=None, links=None, resolve=link_template):
+        """
+        Return the representations of several objects.
+
+        Args:
+            objs (iterable): Model instances or rows with the needed attributes
+            fields (tuple): Field names to include, defaults to all fields
+            links (tuple): Link names to include, defaults to all links
+            resolve (callable): Returns the link template for (endpoint, param);
+                defaults to the Flask application's
+
+        Returns:
+            list: One dict per object
+        """
+        fields = tuple(self.fields) if fields is None else tuple(fields)
+        links = tuple(self.links) if links is None else tuple(links)
+        dump = self._compiled.get((fields, links))
+        if dump is None:
+            dump = self._compiled[(fields, links)] = self._compile(fields, links)
+        templates = [resolve(self.links[name][0],
+                             self.links[name][1] and self.links[name][1][0])
+                     for name in links]
+        return [dump(obj, templates) for obj in objs]
+
+    def _compile(self, fields, links):
+        """Generate a function building the dict for these fields and links."""
+        namespace = {}
+        items = []
+        for i, name in enumerate(fields):
+            formatter = self.fields[name]
+            if formatter is None:
+                items.append(f'{name!r}: obj.{name}')
+            else:
+                namespace[f'format_{i}'] = formatter
+                items.append(f'{name!r}: format_{i}(obj.{name})')
+        link_items = []
+        for i, name in enumerate(links):
+            _, arg = self.links[name]
+            if arg is None:
+                link_items.append(f'{name!r}: templates[{i}][0]')
+            else:
+                link_items.append(
+                    f'{name!r}: templates[{i}][0] + str(obj.{arg[1]}) + templates[{i}][1]')
+        if link_items:
+            items.append(f"'_links': {{{', '.join(link_items)}}}")
+        # Names come from the serializer definition, never from the request
+        source = f"def dump(obj, templates):\n    return {{{', '.join(items)}}}\n"
+        exec(compile(source, f'<serializer {",".join(fields)}>', 'exec'), namespace)
+        return namespace['dump']
+
+post_serializer = Serializer(
+    fields={
+        'id': None,
+        'title': None,
+        'content': None,
+        'created_at': isoformat,
+        'user_id': None
+    },
+    links={
+        'self': ('api.get_post', ('id', 'id')),
+        'author': ('api.get_user', ('id', 'user_id')),
+        'posts': ('api.get_posts', None)
+    }
+)
+
+user_serializer = Serializer(
+    fields={
+        'id': None,
+        'username': None,
+        'email': None,
+        'created_at': isoformat
+    },
+    links={
+        'self': ('api.get_user', ('id', 'id')),
+        'users': ('api.get_users', None)
+    }
+)
+
+# Links included in collection items and write responses
+POST_ITEM_LINKS = ('self', 'author')
+USER_ITEM_LINKS = ('self',)
+
+# Fields of users in collections and write responses
+USER_SUMMARY_FIELDS = ('id', 'username', 'email')
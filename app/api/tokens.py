@@ -0,0 +1,14 @@
+from flask import current_app, g, jsonify
+from app.api import bp
+from app.api.auth import basic_auth, generate_token
+
+@bp.route('/tokens', methods=['POST'])
+@basic_auth.login_required
+def get_token():
+    """Issue a signed bearer token for the authenticated user."""
+    response = jsonify({
+        'token': generate_token(g.current_user),
+        'expires_in': current_app.config['API_TOKEN_EXPIRATION']
+    })
+    response.status_code = 201
+    return response
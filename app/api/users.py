@@ -1,39 +1,113 @@
-from flask import jsonify, request, url_for
-from app import db
-from app.models import User
+from flask import Response, current_app, jsonify, request, stream_with_context, url_for
+from sqlalchemy import select
+from sqlalchemy.orm.exc import StaleDataError
+from app import cache, db, entity_cache
+from app.caching import is_ok, namespace_key
+from app.models import Post, User
 from app.api import bp
-from app.api.errors import bad_request, not_found
-from app.api.auth import basic_auth
+from app.api.errors import bad_request, not_found, precondition_failed
+from app.api.conditional import check_if_match, not_modified, set_validators
+from app.api.serializers import (POST_ITEM_LINKS, USER_ITEM_LINKS, USER_SUMMARY_FIELDS,
+                                 post_serializer, user_serializer)
+from app.api.auth import multi_auth
+from app.api.pagination import CursorError, get_page_limit, keyset_paginate
+from app.api.posts import invalidate_post_cache
 
 @bp.route('/users', methods=['GET'])
-@basic_auth.login_required
+@multi_auth.login_required
 def get_users():
-    """Return list of all users."""
-    users = User.query.all()
-    return jsonify([{
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
+    """Return a page of users, or stream every user with ?stream=1."""
+    if request.args.get('stream', '').lower() in ('1', 'true'):
+        return stream_users()
+
+    limit = get_page_limit()
+    after = request.args.get('after')
+    try:
+        users, next_cursor = keyset_paginate(User.query, [User.id], after=after, limit=limit)
+    except CursorError:
+        return bad_request('Invalid cursor')
+    fields = user_serializer.select(request.args.get('fields'), USER_SUMMARY_FIELDS)
+    return jsonify({
+        'items': user_serializer.dump_many(users, fields, USER_ITEM_LINKS),
+        '_meta': {
+            'limit': limit,
+            'next_cursor': next_cursor
+        },
         '_links': {
-            'self': url_for('api.get_user', id=user.id)
+            'self': url_for('api.get_users', limit=limit, after=after),
+            'next': url_for('api.get_users', limit=limit, after=next_cursor)
+            if next_cursor else None
         }
-    } for user in users])
+    })
+
+def stream_users():
+    """
+    Stream all users as a JSON array without materializing the table.
+
+    Rows are fetched from a server-side cursor in batches of
+    API_STREAM_BATCH_SIZE and each batch is written out as soon as it is
+    encoded, so worker memory stays flat regardless of the number of users.
+    """
+    batch_size = current_app.config['API_STREAM_BATCH_SIZE']
+    fields = user_serializer.select(request.args.get('fields'), USER_SUMMARY_FIELDS)
+    statement = select(*(getattr(User, name) for name in fields)).order_by(User.id)
+    dumps = current_app.json.dumps
+
+    def generate():
+        result = db.session.execute(statement.execution_options(yield_per=batch_size))
+        try:
+            yield '['
+            first = True
+            for rows in result.partitions():
+                chunk = dumps(user_serializer.dump_many(rows, fields, USER_ITEM_LINKS))[1:-1]
+                yield chunk if first else ',' + chunk
+                first = False
+            yield ']'
+        finally:
+            result.close()
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 @bp.route('/users/<int:id>', methods=['GET'])
-@basic_auth.login_required
+@multi_auth.login_required
 def get_user(id):
     """Return a user."""
-    user = db.session.get(User, id)
+    user = entity_cache.get(User, id)
     if user is None:
         return not_found(f"User with id {id} not found")
+    response = not_modified(user)
+    if response is not None:
+        return response
+    response = jsonify(user_serializer.dump(
+        user, user_serializer.select(request.args.get('fields'))))
+    return set_validators(response, user)
+
+@bp.route('/users/<int:id>/posts', methods=['GET'])
+@cache.cached(make_cache_key=namespace_key('posts'), response_filter=is_ok)
+def get_user_posts(id):
+    """Return a page of a user's posts ordered by creation time."""
+    if entity_cache.get(User, id) is None:
+        return not_found(f"User with id {id} not found")
+    limit = get_page_limit()
+    after = request.args.get('after')
+    try:
+        posts, next_cursor = keyset_paginate(
+            Post.query.filter_by(user_id=id), [Post.created_at, Post.id],
+            after=after, limit=limit)
+    except CursorError:
+        return bad_request('Invalid cursor')
+    fields = post_serializer.select(request.args.get('fields'))
     return jsonify({
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'created_at': user.created_at.isoformat() + 'Z',
+        'items': post_serializer.dump_many(posts, fields, POST_ITEM_LINKS),
+        '_meta': {
+            'limit': limit,
+            'next_cursor': next_cursor
+        },
         '_links': {
-            'self': url_for('api.get_user', id=user.id),
-            'users': url_for('api.get_users')
+            'self': url_for('api.get_user_posts', id=id, limit=limit, after=after),
+            'next': url_for('api.get_user_posts', id=id, limit=limit, after=next_cursor)
+            if next_cursor else None,
+            'author': url_for('api.get_user', id=id)
         }
     })
 
@@ -58,25 +132,21 @@ def create_user():
     db.session.add(user)
     db.session.commit()
 
-    response = jsonify({
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        '_links': {
-            'self': url_for('api.get_user', id=user.id)
-        }
-    })
+    response = jsonify(user_serializer.dump(user, USER_SUMMARY_FIELDS, USER_ITEM_LINKS))
     response.status_code = 201
     response.headers['Location'] = url_for('api.get_user', id=user.id)
-    return response
+    return set_validators(response, user)
 
 @bp.route('/users/<int:id>', methods=['PUT'])
-@basic_auth.login_required
+@multi_auth.login_required
 def update_user(id):
     """Update a user."""
     user = db.session.get(User, id)
     if user is None:
         return not_found(f"User with id {id} not found")
+    response = check_if_match(user)
+    if response is not None:
+        return response
     data = request.get_json() or {}
 
     if 'username' in data and data['username'] != user.username and \
@@ -94,23 +164,24 @@ def update_user(id):
     if 'password' in data:
         user.set_password(data['password'])
 
-    db.session.commit()
-    return jsonify({
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        '_links': {
-            'self': url_for('api.get_user', id=user.id)
-        }
-    })
+    try:
+        db.session.commit()
+    except StaleDataError:
+        db.session.rollback()
+        return precondition_failed('Resource has been modified')
+    response = jsonify(user_serializer.dump(user, USER_SUMMARY_FIELDS, USER_ITEM_LINKS))
+    return set_validators(response, user)
 
 @bp.route('/users/<int:id>', methods=['DELETE'])
-@basic_auth.login_required
+@multi_auth.login_required
 def delete_user(id):
     """Delete a user."""
     user = db.session.get(User, id)
     if user is None:
         return not_found(f"User with id {id} not found")
+    # The user's posts are removed by the cascade, so drop them from the cache
+    post_ids = [post_id for post_id, in user.posts.with_entities(Post.id)]
     db.session.delete(user)
     db.session.commit()
+    invalidate_post_cache(*post_ids)
     return '', 204
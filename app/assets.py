@@ -0,0 +1,118 @@
+"""
+Content-hashed (fingerprinted) static files.
+
+`flask fingerprint-static` copies each file in the static folder to a name
+carrying a hash of its content (css/style.css -> css/style.1a2b3c4d5e6f.css)
+and writes the mapping to STATIC_MANIFEST. When the manifest exists,
+url_for('static', filename='css/style.css') links to the hashed copy. Those
+copies never change, so they are served with Cache-Control: immutable and a
+year's max-age, by nginx and by Flask when it serves static files itself;
+a deploy that changes a file changes its URL, so browsers fetch it at once.
+
+Copies of earlier versions are left in place, so pages rendered before a
+deploy keep working. The manifest is read when the app is created: rerun
+the command after editing static files, or delete the manifest while
+developing to link to the files as they are.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import click
+from flask import current_app, request
+
+# Hex digits of the SHA-256 digest kept in hashed names
+HASH_LENGTH = 12
+HASHED_NAME = re.compile(r'\.[0-9a-f]{%d}\.[^./]+$' % HASH_LENGTH)
+
+# One year, as recommended for immutable resources
+IMMUTABLE_MAX_AGE = 31536000
+
+class Manifest:
+    """Mapping of static filenames to the names of their hashed copies."""
+
+    def __init__(self, files):
+        self.files = dict(files)
+        self.hashed = frozenset(self.files.values())
+
+    @classmethod
+    def load(cls, path):
+        """Read a manifest file; a missing file gives an empty manifest."""
+        try:
+            with open(path) as f:
+                return cls(json.load(f))
+        except FileNotFoundError:
+            return cls({})
+
+    def save(self, path):
+        """Write the manifest, replacing the file atomically."""
+        temp = f'{path}.tmp'
+        with open(temp, 'w') as f:
+            json.dump(self.files, f, indent=2, sort_keys=True)
+        os.replace(temp, path)
+
+def hashed_name(filename, data):
+    """Return filename with a hash of data inserted before its extension."""
+    root, ext = os.path.splitext(filename)
+    return f'{root}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}'
+
+def fingerprint_static(directory):
+    """
+    Write hashed copies of the files under directory.
+
+    Precompressed siblings (.gz/.br) and earlier hashed copies are skipped.
+
+    Args:
+        directory (str): Static folder to walk
+
+    Returns:
+        tuple: (Manifest of the current files, paths of the copies written)
+    """
+    files = {}
+    written = []
+    for root, _, names in os.walk(directory):
+        for name in sorted(names):
+            if name.endswith(('.gz', '.br')) or HASHED_NAME.search(name):
+                continue
+            path = os.path.join(root, name)
+            with open(path, 'rb') as f:
+                data = f.read()
+            filename = os.path.relpath(path, directory).replace(os.sep, '/')
+            files[filename] = hashed_name(filename, data)
+            target = os.path.join(directory, *files[filename].split('/'))
+            if not os.path.exists(target):
+                shutil.copy2(path, target)
+                written.append(target)
+    return Manifest(files), written
+
+def init_app(app):
+    """Link static URLs to hashed copies and register the fingerprint-static command."""
+    app.extensions['static_manifest'] = Manifest.load(app.config['STATIC_MANIFEST'])
+
+    @app.cli.command('fingerprint-static')
+    def fingerprint_static_command():
+        """Write content-hashed copies of the static files and their manifest."""
+        manifest, written = fingerprint_static(app.static_folder)
+        manifest.save(app.config['STATIC_MANIFEST'])
+        for path in written:
+            click.echo(f'Wrote {os.path.relpath(path, app.root_path)}')
+        click.echo(f'{len(written)} hashed files written, {len(manifest.files)} in the manifest.')
+
+    @app.url_defaults
+    def fingerprinted_static_url(endpoint, values):
+        if endpoint == 'static':
+            files = current_app.extensions['static_manifest'].files
+            if values.get('filename') in files:
+                values['filename'] = files[values['filename']]
+
+    @app.after_request
+    def cache_fingerprinted(response):
+        """Let clients keep hashed static files without revalidating them."""
+        if request.endpoint == 'static' and response.status_code in (200, 304) \
+                and request.view_args.get('filename') in current_app.extensions['static_manifest'].hashed:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        return response
@@ -0,0 +1,200 @@
+"""Helpers for caching rendered responses with Flask-Caching, and in-process caching."""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from urllib.parse import urlencode
+from flask import g, request, session
+from flask_login import current_user
+from app import cache
+
+def _generation(namespace):
+    """Return the current generation token for a cache namespace."""
+    key = f'{namespace}:generation'
+    token = cache.get(key)
+    if token is None:
+        # A missing token (first use or eviction) gets a fresh value so that
+        # entries written under an earlier token can never be served again.
+        token = uuid.uuid4().hex
+        cache.set(key, token, timeout=0)
+    return token
+
+def invalidate(namespace):
+    """Invalidate every entry cached under namespace_key(namespace)."""
+    cache.set(f'{namespace}:generation', uuid.uuid4().hex, timeout=0)
+
+def namespace_key(namespace):
+    """
+    Build a make_cache_key callable for views cached under a namespace.
+
+    The key combines the namespace's generation token with the request path
+    and its normalized query string, so a single invalidate() call drops all
+    cached variants of a collection (every page, limit and cursor).
+
+    Args:
+        namespace (str): Name shared by the views to invalidate together
+
+    Returns:
+        callable: Function suitable for Cache.cached(make_cache_key=...)
+    """
+    def make_cache_key(*args, **kwargs):
+        query = urlencode(sorted(request.args.items(multi=True)))
+        return f'view/{namespace}:{_generation(namespace)}:{request.path}?{query}'
+    return make_cache_key
+
+# Flask-Caching backends that keep entries in the memory of one process
+PER_PROCESS_BACKENDS = ('simple', 'simplecache')
+
+def check_backend(app):
+    """
+    Refuse a per-process response cache when the app runs in several processes.
+
+    invalidate() and cache.delete() only reach the backend of the process
+    handling the write, so every other worker would keep serving stale
+    responses for up to CACHE_DEFAULT_TIMEOUT seconds.
+
+    Raises:
+        RuntimeError: If CACHE_TYPE is SimpleCache and WORKER_PROCESSES > 1
+    """
+    backend = app.config['CACHE_TYPE'].rsplit('.', 1)[-1].lower()
+    if backend in PER_PROCESS_BACKENDS and app.config['WORKER_PROCESSES'] > 1:
+        raise RuntimeError(
+            f"CACHE_TYPE={app.config['CACHE_TYPE']} keeps a separate cache in each of the "
+            f"{app.config['WORKER_PROCESSES']} worker processes; use RedisCache or FileSystemCache")
+
+def is_ok(response):
+    """
+    Only cache successful responses built from primary reads.
+
+    A replica may lag behind a write that just invalidated the cache; what
+    it returns must not be stored again under the new generation.
+    """
+    return response.status_code == 200 and not g.get('db_replica_read')
+
+def is_personalized():
+    """Return True when a rendered page depends on the current session."""
+    return current_user.is_authenticated or bool(session.get('_flashes'))
+
+def user_fragment_key():
+    """
+    Return the part of a template fragment's cache key naming the current user.
+
+    The user's version is included, so fragments showing user data are
+    re-rendered once the user changes.
+    """
+    if not current_user.is_authenticated:
+        return 'anonymous'
+    return f'{current_user.get_id()}.{current_user.version}'
+
+class LocalCache:
+    """Thread-safe LRU mapping of bounded size whose entries expire after ttl seconds."""
+
+    def __init__(self, maxsize, ttl):
+        """
+        Args:
+            maxsize (int): Entries kept; the least recently used go first
+            ttl (float): Seconds an entry is served after it was set
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value stored under key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting the least recently used entries."""
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        """Store value under key unless a live entry is there; return True if stored."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                return False
+            self._set(key, value, ttl)
+            return True
+
+    def _set(self, key, value, ttl):
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        """Remove the given keys."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._entries.clear()
+
+class _Flight:
+    """A call in progress and, once done, its outcome."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.ok = False
+        self.result = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one.
+
+    Waiting uses threading primitives, which gevent's monkey-patching makes
+    cooperative, so it works for threads and greenlets alike.
+    """
+
+    def __init__(self, timeout):
+        """
+        Args:
+            timeout (float): Seconds a caller waits for another's call before
+                making its own
+        """
+        self.timeout = timeout
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """
+        Return fn(), calling it once for all callers asking for key meanwhile.
+
+        The first caller runs fn and the others wait for its result. If that
+        call raises or takes longer than the timeout, the waiting callers
+        run fn themselves.
+
+        Returns:
+            tuple: (result, shared) where shared is True if the result came
+                from another caller's call
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+        if not leader:
+            if flight.done.wait(self.timeout) and flight.ok:
+                return flight.result, True
+            return fn(), False
+        try:
+            flight.result = fn()
+            flight.ok = True
+            return flight.result, False
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
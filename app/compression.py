@@ -0,0 +1,172 @@
+"""
+Response compression and precompressed static files.
+
+Responses of a compressible type are encoded with brotli or gzip, whichever
+the client's Accept-Encoding prefers (brotli on ties, when installed).
+Buffered responses are only compressed from COMPRESSION_MIN_SIZE bytes up:
+below that, the saving does not pay for the CPU time. Streamed responses are
+compressed chunk by chunk and flushed after each one, so clients still
+receive data as soon as it is produced.
+
+A compressed body is a different representation from the identity body, so
+a strong ETag is made weak (W/) when the body is compressed (RFC 9110,
+section 8.8.3). If-None-Match compares tags weakly and If-Match on the API
+accepts either form. Vary: Accept-Encoding keeps shared caches from mixing
+encodings.
+
+`flask compress-static` writes .gz and .br files next to the static files so
+nginx can serve them (gzip_static / brotli_static) without compressing on
+each request.
+"""
+import gzip
+import mimetypes
+import os
+import zlib
+import click
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+def available_encodings():
+    """Return the supported content codings, most preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def compress(data, encoding, level):
+    """
+    Compress a whole body.
+
+    Args:
+        data (bytes): Body to compress
+        encoding (str): 'br' or 'gzip'
+        level (int): Brotli quality (0-11) or gzip level (1-9)
+
+    Returns:
+        bytes: The compressed body
+    """
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+def compress_stream(chunks, encoding, level):
+    """Compress an iterable of chunks, flushing the output after each one."""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=level)
+        compress_chunk = lambda chunk: compressor.process(chunk) + compressor.flush()
+        finish = compressor.finish
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        compress_chunk = lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield compress_chunk(chunk)
+        yield finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+def compress_response(response, config):
+    """
+    Compress response in place if its type, size and the client allow it.
+
+    Args:
+        response: Flask response
+        config (dict): Application configuration
+
+    Returns:
+        The response
+    """
+    if response.mimetype not in config['COMPRESSION_MIMETYPES']:
+        return response
+    response.vary.add('Accept-Encoding')
+    if response.status_code < 200 or response.status_code in (204, 206, 304) \
+            or response.direct_passthrough or 'Content-Encoding' in response.headers \
+            or response.cache_control.no_transform:
+        return response
+    encoding = request.accept_encodings.best_match(available_encodings())
+    if encoding is None:
+        return response
+    level = config['COMPRESSION_BROTLI_QUALITY'] if encoding == 'br' \
+        else config['COMPRESSION_GZIP_LEVEL']
+
+    if response.is_streamed:
+        response.response = compress_stream(response.response, encoding, level)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESSION_MIN_SIZE']:
+            return response
+        response.set_data(compress(data, encoding, level))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+def compress_static(directory, mimetypes_allowed, min_size):
+    """
+    Write .gz and .br siblings for the compressible files under directory.
+
+    Files below min_size, and encodings that do not make a file smaller, are
+    skipped; siblings newer than their source are left alone.
+
+    Args:
+        directory (str): Static folder to walk
+        mimetypes_allowed (list): Content types worth compressing
+        min_size (int): Smallest file size to compress, in bytes
+
+    Returns:
+        list: Paths of the files written
+    """
+    written = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            path = os.path.join(root, name)
+            if name.endswith(('.gz', '.br')) \
+                    or mimetypes.guess_type(name)[0] not in mimetypes_allowed:
+                continue
+            source_mtime = os.path.getmtime(path)
+            with open(path, 'rb') as f:
+                data = f.read()
+            if len(data) < min_size:
+                continue
+            for encoding, suffix, level in (('gzip', '.gz', 9), ('br', '.br', 11)):
+                if encoding not in available_encodings():
+                    continue
+                target = path + suffix
+                if os.path.exists(target) and os.path.getmtime(target) >= source_mtime:
+                    continue
+                compressed = compress(data, encoding, level)
+                if len(compressed) >= len(data):
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+                # Same mtime as the source, as nginx's gzip_static expects
+                os.utime(target, (source_mtime, source_mtime))
+                written.append(target)
+    return written
+
+def init_app(app):
+    """Register response compression and the compress-static command."""
+
+    @app.cli.command('compress-static')
+    def compress_static_command():
+        """Write precompressed .gz/.br copies of the static files."""
+        written = compress_static(app.static_folder, app.config['COMPRESSION_MIMETYPES'],
+                                  app.config['COMPRESSION_MIN_SIZE'])
+        for path in written:
+            click.echo(f'Wrote {os.path.relpath(path, app.root_path)}')
+        click.echo(f'{len(written)} precompressed files written.')
+
+    if not app.config['COMPRESSION_ENABLED']:
+        return
+
+    @app.after_request
+    def compress_after_request(response):
+        return compress_response(response, app.config)
@@ -0,0 +1,43 @@
+"""
+Engine options derived from the DB_POOL_* settings.
+
+Pool sizing only means something to a QueuePool (and its asyncio variant).
+SQLite in-memory databases get a SingletonThreadPool or StaticPool, whose
+constructors reject pool_size, max_overflow and pool_timeout, so those are
+only added when the database's pool class takes them.
+"""
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+# Options understood by QueuePool alone
+POOL_SIZING = ('pool_size', 'max_overflow', 'pool_timeout')
+
+def pool_class(url, options=None):
+    """Return the pool class create_engine() will use for url and options."""
+    options = options or {}
+    if 'poolclass' in options:
+        return options['poolclass']
+    if 'pool' in options:
+        return type(options['pool'])
+    url = make_url(url)
+    return url.get_dialect().get_pool_class(url)
+
+def engine_options(url, settings):
+    """
+    Build create_engine() keyword arguments for a database.
+
+    Args:
+        url (str or URL): Database URL, sync or async
+        settings (Mapping): Application config with SQLALCHEMY_ENGINE_OPTIONS
+            and the DB_POOL_* settings
+
+    Returns:
+        dict: SQLALCHEMY_ENGINE_OPTIONS, plus pool sizing if the pool takes it
+    """
+    options = {key: value for key, value in settings['SQLALCHEMY_ENGINE_OPTIONS'].items()
+               if key not in POOL_SIZING}
+    if issubclass(pool_class(url, options), QueuePool):
+        options.update(pool_size=settings['DB_POOL_SIZE'],
+                       max_overflow=settings['DB_MAX_OVERFLOW'],
+                       pool_timeout=settings['DB_POOL_TIMEOUT'])
+    return options
@@ -0,0 +1,257 @@
+"""
+Two-tier cache for primary-key loads of users and posts.
+
+get() looks an entity up in a per-process LRU (L1), then in the shared
+Flask-Caching backend (L2, e.g. Redis) when ENTITY_CACHE_SHARED is on, and
+only then in the database; the row it finds is stored in both tiers.
+Entities are cached as dicts of column values and handed out as detached
+instances, so they suit reads only: code that modifies an entity loads it
+with db.session.get() as before.
+
+Updates and deletes of cached models are tracked per session and, once
+committed, evicted from this process's L1 and from L2. Eviction leaves an
+"invalidated" marker for a few seconds and entries are only ever added, not
+overwritten, so a load that read the row before the commit cannot store its
+stale copy afterwards. Other processes drop their L1 copy within
+ENTITY_CACHE_TTL seconds. Rows are not cached when read from a replica,
+which may lag, or by a session with uncommitted writes.
+
+Concurrent misses for the same entity in a process are coalesced: the first
+request loads it and the others wait for its result instead of each taking a
+pool connection (ENTITY_CACHE_COALESCE). With ENTITY_CACHE_SHARED_LOCK, the
+loading request also holds a lock in the shared cache, and other processes
+missing the same entity wait for it to appear there.
+"""
+import time
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from app.caching import LocalCache, SingleFlight
+from app.metrics import ENTITY_CACHE_LOOKUPS
+from app.replicas import RoutingSession
+
+# Stored in place of an evicted entity until loads that began before the
+# eviction are over
+INVALIDATED = 'invalidated'
+
+# app.extensions keys of the EntityCache instances kept in step with commits
+CACHE_EXTENSIONS = ('entity_cache', 'identity_cache')
+
+class EntityCache:
+    """Per-process LRU of entities in front of an optional shared cache."""
+
+    # Seconds between looks at the shared cache while another process loads
+    LOCK_POLL_INTERVAL = 0.01
+    # Seconds an evicted entity stays uncacheable; longer than any load
+    INVALIDATED_TTL = 10
+
+    def __init__(self, models, maxsize, ttl, shared=None, shared_ttl=None,
+                 coalesce_timeout=None, shared_lock=False):
+        """
+        Args:
+            models (tuple): Mapped classes whose primary-key loads are cached
+            maxsize (int): Entities kept in this process
+            ttl (float): Seconds an entity is served from this process
+            shared: Flask-Caching Cache used as the second level, or None
+            shared_ttl (int): Seconds an entity is kept in the shared cache
+            coalesce_timeout (int): Seconds a miss waits for a concurrent load
+                of the same entity, or None not to coalesce misses
+            shared_lock (bool): Whether to also coalesce loads across
+                processes with a lock in the shared cache
+        """
+        self.models = tuple(models)
+        self.local = LocalCache(maxsize, ttl)
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.coalesce_timeout = coalesce_timeout
+        self.flights = SingleFlight(coalesce_timeout) if coalesce_timeout else None
+        self.shared_lock = shared_lock and shared is not None and bool(coalesce_timeout)
+
+    @staticmethod
+    def key(model, id):
+        return f'entity/{model.__tablename__}/{id}'
+
+    def label(self, model):
+        """Return the entity label of model's lookups in ENTITY_CACHE_LOOKUPS."""
+        return model.__tablename__
+
+    def columns(self, model):
+        """Return the names of the columns of model that are cached."""
+        return [attr.key for attr in inspect(model).column_attrs]
+
+    def get(self, session, model, id):
+        """
+        Return the entity of model with primary key id, or None if there is none.
+
+        Args:
+            session: Session used to load the entity on a miss
+            model: Mapped class, one of self.models
+            id: Primary key value
+
+        Returns:
+            Instance (detached when served from the cache), or None
+        """
+        key = self.key(model, id)
+        fields = _fields(self.local.get(key))
+        if fields is not None:
+            ENTITY_CACHE_LOOKUPS.labels(self.label(model), 'l1_hit').inc()
+            return _detached(model, fields)
+        if self.shared is not None:
+            fields = _fields(self.shared.get(key))
+            if fields is not None:
+                ENTITY_CACHE_LOOKUPS.labels(self.label(model), 'l2_hit').inc()
+                self.local.add(key, fields)
+                return _detached(model, fields)
+
+        # A session with uncommitted writes must see its own rows
+        if self.flights is None or not _cacheable(session):
+            return self._load(session, model, id)[0]
+        (obj, fields, cached), coalesced = self.flights.do(
+            key, lambda: self._load(session, model, id))
+        if not coalesced:
+            return obj
+        if not cached:
+            # The other request read from a replica; read as this one would
+            return self._load(session, model, id)[0]
+        ENTITY_CACHE_LOOKUPS.labels(self.label(model), 'coalesced').inc()
+        return _detached(model, fields) if fields is not None else None
+
+    def _load(self, session, model, id):
+        """
+        Load an entity from the database and cache it if the read allows.
+
+        Returns:
+            tuple: (instance or None, cached column values or None, whether
+                the result is committed data that other requests may share)
+        """
+        key = self.key(model, id)
+        lock = f'lock/{key}'
+        locked = self.shared_lock and self.shared.add(lock, 1, timeout=self.coalesce_timeout)
+        if self.shared_lock and not locked:
+            fields = self._wait_shared(key)
+            if fields is not None:
+                ENTITY_CACHE_LOOKUPS.labels(self.label(model), 'l2_hit').inc()
+                self.local.add(key, fields)
+                return _detached(model, fields), fields, True
+        try:
+            ENTITY_CACHE_LOOKUPS.labels(self.label(model), 'miss').inc()
+            obj = session.get(model, id)
+            cached = _cacheable(session)
+            if obj is None:
+                return None, None, cached
+            fields = {name: getattr(obj, name) for name in self.columns(model)}
+            if cached:
+                # add() leaves an INVALIDATED marker from a commit made
+                # since the row was read in place
+                self.local.add(key, fields)
+                if self.shared is not None:
+                    self.shared.add(key, fields, timeout=self.shared_ttl)
+            return obj, fields, cached
+        finally:
+            if locked:
+                self.shared.delete(lock)
+
+    def _wait_shared(self, key):
+        """Wait for another process to store an entity in the shared cache."""
+        deadline = time.monotonic() + self.coalesce_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.LOCK_POLL_INTERVAL)
+            fields = _fields(self.shared.get(key))
+            if fields is not None:
+                return fields
+        return None
+
+    def invalidate(self, *entities):
+        """Forget entities given as (model, id) pairs."""
+        keys = [self.key(model, id) for model, id in entities]
+        for key in keys:
+            self.local.set(key, INVALIDATED, ttl=self.INVALIDATED_TTL)
+        if self.shared is not None and keys:
+            self.shared.set_many(dict.fromkeys(keys, INVALIDATED), timeout=self.INVALIDATED_TTL)
+
+    def clear(self):
+        """Forget every entity held by this process."""
+        self.local.clear()
+
+def _fields(value):
+    """Return a cached entry's fields, or None for a miss or an INVALIDATED marker."""
+    return None if value is None or value == INVALIDATED else value
+
+def _detached(model, fields):
+    """Build a detached instance of model from cached column values."""
+    obj = inspect(model).class_manager.new_instance()
+    for name, value in fields.items():
+        set_committed_value(obj, name, value)
+    make_transient_to_detached(obj)
+    return obj
+
+def _cacheable(session):
+    """Return True if what the session reads is committed data from the primary."""
+    if session.new or session.dirty or session.deleted or session.info.get('uncommitted'):
+        return False
+    return session.info.get('replica') is None or session.info.get('use_primary', False)
+
+def _caches():
+    """Return the current app's entity caches (CACHE_EXTENSIONS that are set up)."""
+    if not has_app_context():
+        return []
+    return [cache for cache in map(current_app.extensions.get, CACHE_EXTENSIONS)
+            if cache is not None]
+
+def get(model, id):
+    """
+    Load an entity for reading, through the entity cache when enabled.
+
+    Args:
+        model: User or Post
+        id: Primary key value
+
+    Returns:
+        Instance, or None if there is no such row
+    """
+    from app import db
+
+    cache = current_app.extensions.get('entity_cache')
+    if cache is None or model not in cache.models:
+        return db.session.get(model, id)
+    return cache.get(db.session, model, id)
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _track_changes(session, flush_context):
+    """Remember cached entities updated or deleted by this flush, until commit."""
+    caches = _caches()
+    if not caches:
+        return
+    session.info['uncommitted'] = True
+    models = tuple(model for cache in caches for model in cache.models)
+    changed = session.info.setdefault('changed_entities', set())
+    for obj in session.dirty | session.deleted:
+        if isinstance(obj, models):
+            changed.add((type(obj), inspect(obj).identity[0]))
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _invalidate_changes(session):
+    session.info.pop('uncommitted', None)
+    changed = session.info.pop('changed_entities', None)
+    if changed:
+        for cache in _caches():
+            cache.invalidate(*(entity for entity in changed if entity[0] in cache.models))
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _forget_changes(session):
+    session.info.pop('uncommitted', None)
+    session.info.pop('changed_entities', None)
+
+def init_app(app):
+    """Set up the entity cache, if ENTITY_CACHE is on."""
+    if not app.config['ENTITY_CACHE']:
+        return
+    from app import cache
+    from app.models import Post, User
+    app.extensions['entity_cache'] = EntityCache(
+        (User, Post), app.config['ENTITY_CACHE_SIZE'], app.config['ENTITY_CACHE_TTL'],
+        cache if app.config['ENTITY_CACHE_SHARED'] else None,
+        app.config['ENTITY_CACHE_SHARED_TTL'],
+        app.config['ENTITY_CACHE_COALESCE_TIMEOUT'] if app.config['ENTITY_CACHE_COALESCE'] else None,
+        app.config['ENTITY_CACHE_SHARED_LOCK'])
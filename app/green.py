@@ -0,0 +1,48 @@
+"""
+Cooperative database I/O under gevent.
+
+psycopg2 talks to PostgreSQL from C, so monkey-patching the socket module
+does not make it yield: a greenlet waiting on a query blocks the whole
+worker. Installing a wait callback (as psycogreen does) puts the driver in
+asynchronous mode and waits on the connection's socket through the gevent
+hub instead.
+"""
+import logging
+
+try:
+    import psycopg2
+    from psycopg2 import extensions
+except ImportError:  # PostgreSQL support is optional
+    psycopg2 = None
+
+logger = logging.getLogger(__name__)
+
+def gevent_wait_callback(conn, timeout=None):
+    """Wait for a psycopg2 connection to be ready, yielding to the gevent hub."""
+    from gevent.socket import wait_read, wait_write
+    while True:
+        state = conn.poll()
+        if state == extensions.POLL_OK:
+            break
+        elif state == extensions.POLL_READ:
+            wait_read(conn.fileno(), timeout=timeout)
+        elif state == extensions.POLL_WRITE:
+            wait_write(conn.fileno(), timeout=timeout)
+        else:
+            raise psycopg2.OperationalError(f'Bad result from poll: {state!r}')
+
+def patch_psycopg():
+    """
+    Make psycopg2 cooperative with gevent in this process.
+
+    Meant to be called from gunicorn's `post_worker_init` hook in gevent
+    workers. COPY is not available on connections in this mode.
+
+    Returns:
+        bool: True if psycopg2 is installed and was patched
+    """
+    if psycopg2 is None:
+        return False
+    extensions.set_wait_callback(gevent_wait_callback)
+    logger.info("psycopg2 wait callback installed for gevent")
+    return True
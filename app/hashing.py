@@ -0,0 +1,88 @@
+"""Password hashing that can run outside the serving process."""
+import logging
+import multiprocessing
+import os
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+def start_executor(max_workers=None):
+    """
+    Start the process pool used for password hashing in this process.
+
+    Meant to be called once per gunicorn worker from the `post_worker_init` hook.
+    Waiting on the pool's futures goes through (monkey-patched) threading
+    primitives, so under gevent the calling greenlet yields to the hub while
+    the key derivation runs in another process.
+
+    Args:
+        max_workers (int): Pool size, defaults to the number of CPU cores
+    """
+    global _executor
+    if _executor is not None:
+        return
+    # Imported here, after gevent has patched the worker: the module creates
+    # locks at import, and with preload_app the app is imported in the
+    # unpatched master, which left the pool unable to shut down.
+    from concurrent.futures import ProcessPoolExecutor
+    max_workers = max_workers or os.cpu_count() or 1
+    # Spawn fresh interpreters rather than forking a copy of the worker,
+    # its gevent hub and its open database connections.
+    _executor = ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=multiprocessing.get_context('spawn')
+    )
+    logger.info(f"Password hashing pool started with {max_workers} processes")
+
+def shutdown_executor():
+    """
+    Stop the password hashing pool, if one is running.
+
+    Waits for the pool's manager thread and processes to finish. Under gevent
+    the manager thread is a greenlet, so this must run while the hub can still
+    switch to it (gunicorn's `worker_exit` hook); left to the interpreter's
+    exit handler, joining it raises LoopExit.
+    """
+    global _executor
+    if _executor is None:
+        return
+    _executor.shutdown(wait=True, cancel_futures=True)
+    _executor = None
+
+def _run(fn, *args):
+    """Run fn in the hashing pool when available, otherwise inline."""
+    if _executor is None:
+        return fn(*args)
+    return _executor.submit(fn, *args).result()
+
+def hash_password(password):
+    """
+    Hash a password with the configured key derivation function.
+
+    Args:
+        password (str): The plain-text password
+
+    Returns:
+        str: The salted password hash
+    """
+    return _run(generate_password_hash, password,
+                current_app.config['PASSWORD_HASH_METHOD'])
+
+def verify_password(pwhash, password):
+    """
+    Check a password against a hash produced by hash_password.
+
+    The cost parameters are read from the hash itself, so hashes created
+    under an older PASSWORD_HASH_METHOD keep verifying.
+
+    Args:
+        pwhash (str): The stored password hash
+        password (str): The plain-text password to check
+
+    Returns:
+        bool: True if the password matches
+    """
+    return _run(check_password_hash, pwhash, password)
@@ -0,0 +1,94 @@
+"""
+Cached login identities for Flask-Login.
+
+Pages viewed by a logged-in browser only need a few columns of the user
+(username, email, created_at), so load_user returns an Identity snapshot
+from a per-process LRU with a TTL instead of reading the users table on
+every request. With IDENTITY_CACHE_SHARED, misses in the process cache go to
+the Flask-Caching backend (e.g. Redis) before the database.
+
+IdentityCache is an EntityCache of users (see app/entity_cache.py), so
+every committed change to a user (an update, which also bumps its version,
+a password change or a deletion) evicts that user from this process's LRU
+and from the shared cache. Other processes may keep serving their copy for
+at most IDENTITY_CACHE_TTL seconds. Users read from a replica, as on GET
+requests when replicas are configured, are not cached.
+"""
+from flask import current_app
+from flask_login import UserMixin
+from app.entity_cache import EntityCache
+
+# Columns copied into identities
+IDENTITY_FIELDS = ('id', 'username', 'email', 'is_admin', 'created_at', 'version')
+
+class Identity(UserMixin):
+    """
+    Read-only snapshot of a User, as current_user of browser sessions.
+
+    Only IDENTITY_FIELDS are available; load the User for anything else.
+    """
+
+    def __init__(self, fields):
+        self.__dict__.update(fields)
+
+    def __repr__(self):
+        return f'<Identity {self.username}>'
+
+def snapshot(user):
+    """Return the cached fields of a User as a dict."""
+    return {name: getattr(user, name) for name in IDENTITY_FIELDS}
+
+class IdentityCache(EntityCache):
+    """
+    Entity cache of the IDENTITY_FIELDS of users, for Flask-Login.
+
+    It shares EntityCache's safeguards: rows read from a replica or by a
+    session with uncommitted writes are not cached, and a load that read a
+    user before a commit changed it cannot store its copy afterwards.
+    """
+
+    def __init__(self, maxsize, ttl, shared=None, shared_ttl=None):
+        """
+        Args:
+            maxsize (int): Identities kept in this process
+            ttl (float): Seconds an identity is served from this process
+            shared: Flask-Caching Cache used as the second level, or None
+            shared_ttl (int): Seconds an identity is kept in the shared cache
+        """
+        from app.models import User
+        super().__init__((User,), maxsize, ttl, shared, shared_ttl)
+
+    @staticmethod
+    def key(model, id):
+        return f'identity/{id}'
+
+    def label(self, model):
+        return 'identity'
+
+    def columns(self, model):
+        return IDENTITY_FIELDS
+
+def load_identity(user_id):
+    """
+    Return the identity of a user for Flask-Login, or None if there is none.
+
+    Falls back to loading the User when the identity cache is disabled.
+    """
+    from app import db
+    from app.models import User
+
+    cache = current_app.extensions.get('identity_cache')
+    if cache is None:
+        return db.session.get(User, user_id)
+    user = cache.get(db.session, User, user_id)
+    return Identity(snapshot(user)) if user is not None else None
+
+def init_app(app):
+    """Set up the identity cache, if IDENTITY_CACHE is on."""
+    if not app.config['IDENTITY_CACHE']:
+        return
+    from app import cache
+    app.extensions['identity_cache'] = IdentityCache(
+        app.config['IDENTITY_CACHE_SIZE'], app.config['IDENTITY_CACHE_TTL'],
+        cache if app.config['IDENTITY_CACHE_SHARED'] else None,
+        app.config['IDENTITY_CACHE_SHARED_TTL'])
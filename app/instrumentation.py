@@ -0,0 +1,235 @@
+"""
+Per-request SQL instrumentation and slow-query logging.
+
+Every statement executed while a request is being handled is timed through
+SQLAlchemy engine events. At the end of the request the totals are added to
+the response as a Server-Timing header and logged with structured fields,
+and statements repeated often enough to suggest an N+1 pattern are flagged.
+
+Independently, any statement slower than SLOW_QUERY_THRESHOLD is logged with
+its parameter types, the route that issued it and its query plan.
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PARAMETER = r'(?:\?|%\(\w+\)s|%s|:\w+)'
+_PARAMETER_LISTS = re.compile(rf'\(\s*{_PARAMETER}(?:\s*,\s*{_PARAMETER})*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+def fingerprint(statement):
+    """
+    Normalize a SQL statement so executions that differ only in values match.
+
+    Literals become '?', parameter lists of any length collapse to '(?)' and
+    whitespace is squeezed.
+
+    Args:
+        statement (str): SQL as sent to the driver
+
+    Returns:
+        str: The normalized statement
+    """
+    statement = _LITERALS.sub('?', statement)
+    statement = _PARAMETER_LISTS.sub('(?)', statement)
+    return _WHITESPACE.sub(' ', statement).strip()
+
+class QueryStats:
+    """SQL activity recorded during one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.slowest = 0.0
+        self.slowest_statement = None
+        self.fingerprints = Counter()
+
+    def record(self, statement, duration):
+        """Account for one executed statement taking duration seconds."""
+        self.count += 1
+        self.total += duration
+        if duration > self.slowest:
+            self.slowest = duration
+            self.slowest_statement = statement
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated_selects(self, threshold):
+        """Return (fingerprint, count) for SELECTs run at least threshold times."""
+        return [(statement, count) for statement, count in self.fingerprints.most_common()
+                if count >= threshold and statement.upper().startswith('SELECT')]
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_start_time'].pop()
+    if has_request_context():
+        stats = g.get('sql_stats')
+        if stats is not None:
+            stats.record(statement, duration)
+    if has_app_context():
+        threshold = current_app.config['SLOW_QUERY_THRESHOLD']
+        if threshold and duration >= threshold:
+            _log_slow_query(conn, cursor, statement, parameters, executemany, duration)
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # Failed statements never reach after_cursor_execute
+    if context.connection is not None and context.connection.info.get('query_start_time'):
+        context.connection.info['query_start_time'].pop()
+
+# Fingerprint -> [last report time, occurrences since then], oldest first
+_slow_queries = OrderedDict()
+_slow_queries_lock = threading.Lock()
+_SLOW_QUERIES_TRACKED = 1000
+
+_EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+    'mysql': 'EXPLAIN ',
+}
+
+# Dialects where a failed statement aborts the rest of the transaction
+_ABORTING_DIALECTS = {'postgresql'}
+
+def parameter_shapes(parameters, executemany=False):
+    """Describe bound parameters by type only, so no values reach the logs."""
+    if executemany:
+        return {'rows': len(parameters),
+                'row': parameter_shapes(parameters[0]) if parameters else None}
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    return [type(value).__name__ for value in parameters or ()]
+
+def _should_report(key, interval):
+    """
+    Rate-limit slow-query reports per fingerprint.
+
+    Returns:
+        int or None: Occurrences since the last report (including this one)
+            if this one should be logged, None if it is suppressed
+    """
+    now = time.monotonic()
+    with _slow_queries_lock:
+        entry = _slow_queries.get(key)
+        if entry is None:
+            _slow_queries[key] = [now, 0]
+            if len(_slow_queries) > _SLOW_QUERIES_TRACKED:
+                _slow_queries.popitem(last=False)
+            return 1
+        entry[1] += 1
+        if now - entry[0] < interval:
+            return None
+        _slow_queries.move_to_end(key)
+        occurrences, entry[0], entry[1] = entry[1], now, 0
+        return occurrences
+
+def explain(conn, cursor, statement, parameters):
+    """
+    Return the query plan of a statement as a list of lines.
+
+    Uses a fresh DB-API cursor on the same connection so the EXPLAIN is not
+    itself instrumented. Only SELECTs are explained. On PostgreSQL the
+    EXPLAIN runs inside a savepoint: a failure would otherwise abort the
+    request's transaction and fail its next statement. Failures are logged.
+    """
+    prefix = _EXPLAIN_PREFIXES.get(conn.dialect.name)
+    if prefix is None or not statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    explain_cursor = cursor.connection.cursor()
+    savepoint = (conn.dialect.name in _ABORTING_DIALECTS
+                 and not getattr(cursor.connection, 'autocommit', False))
+    try:
+        if savepoint:
+            explain_cursor.execute('SAVEPOINT explain_plan')
+        try:
+            explain_cursor.execute(prefix + statement, parameters)
+            return [str(row[-1]) for row in explain_cursor.fetchall()]
+        except Exception as e:
+            if savepoint:
+                explain_cursor.execute('ROLLBACK TO SAVEPOINT explain_plan')
+            logger.warning(f"EXPLAIN failed for {fingerprint(statement)}: {e}")
+            return None
+        finally:
+            if savepoint:
+                explain_cursor.execute('RELEASE SAVEPOINT explain_plan')
+    finally:
+        explain_cursor.close()
+
+def _log_slow_query(conn, cursor, statement, parameters, executemany, duration):
+    """Log a slow statement with its plan, at most once per interval per fingerprint."""
+    key = fingerprint(statement)
+    occurrences = _should_report(key, current_app.config['SLOW_QUERY_LOG_INTERVAL'])
+    if occurrences is None:
+        return
+    route = request.endpoint if has_request_context() else None
+    plan = None
+    if current_app.config['SLOW_QUERY_EXPLAIN'] and not executemany:
+        plan = explain(conn, cursor, statement, parameters)
+    fields = {
+        'statement': statement,
+        'fingerprint': key,
+        'duration_ms': round(duration * 1000, 2),
+        'parameter_shapes': parameter_shapes(parameters, executemany),
+        'route': route,
+        'plan': plan,
+        'occurrences': occurrences,
+    }
+    logger.warning(f"Slow query ({fields['duration_ms']}ms, {occurrences} since last report) "
+                   f"in {route or 'no request'}: {key}"
+                   + (''.join(f'\n    {line}' for line in plan) if plan else ''),
+                   extra=fields)
+
+def init_app(app):
+    """Register the request hooks that collect and report query statistics."""
+    if not app.config['SQL_INSTRUMENTATION']:
+        return
+
+    @app.before_request
+    def start_query_stats():
+        g.request_start = time.perf_counter()
+        g.sql_stats = QueryStats()
+
+    @app.after_request
+    def report_query_stats(response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+        duration = time.perf_counter() - g.request_start
+        response.headers['Server-Timing'] = (
+            f'db;dur={stats.total * 1000:.2f};desc="{stats.count} queries", '
+            f'app;dur={duration * 1000:.2f}'
+        )
+
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round(duration * 1000, 2),
+            'db_queries': stats.count,
+            'db_time_ms': round(stats.total * 1000, 2),
+            'db_slowest_ms': round(stats.slowest * 1000, 2),
+            'db_slowest_statement': stats.slowest_statement,
+        }
+        logger.info(f"{request.method} {request.path} {response.status_code} "
+                    f"{fields['duration_ms']}ms, {stats.count} queries "
+                    f"in {fields['db_time_ms']}ms", extra=fields)
+
+        repeated = stats.repeated_selects(app.config['SQL_N_PLUS_ONE_THRESHOLD'])
+        if repeated:
+            statement, count = repeated[0]
+            logger.warning(f"Possible N+1 query in {request.endpoint}: "
+                           f"statement ran {count} times: {statement}",
+                           extra={**fields, 'n_plus_one': repeated})
+        return response
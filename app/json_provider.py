@@ -0,0 +1,44 @@
+"""JSON provider backed by orjson, used when it is installed."""
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Drop-in replacement for Flask's default JSON provider using orjson.
+
+    Output matches the default provider except that non-ASCII text is written
+    as UTF-8 instead of \\u escapes: keys are sorted when sort_keys is set and
+    datetimes go through the same default() hook. The arguments response()
+    passes (compact separators, or indent=2 in debug mode) map to orjson
+    options; other json.dumps/json.loads arguments fall back to the standard
+    library.
+    """
+
+    def dumps(self, obj, **kwargs):
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        rest = dict(kwargs)
+        if rest.get('indent') == 2:
+            option |= orjson.OPT_INDENT_2
+            del rest['indent']
+            rest.pop('separators', None)
+        elif rest.get('separators') == (',', ':'):
+            del rest['separators']
+        if rest.pop('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if rest:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=option).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+def init_json_provider(app):
+    """Install the orjson provider on app if enabled and available."""
+    if app.config['JSON_FAST_ENCODER'] and orjson is not None:
+        app.json = OrjsonProvider(app)
@@ -1,14 +1,18 @@
 from flask import render_template, flash, redirect, url_for, request, current_app
 from flask_login import login_required, current_user
+from app import cache
+from app.caching import is_personalized
 from app.main import bp
 
 @bp.route('/')
 @bp.route('/index')
+@cache.cached(unless=is_personalized)
 def index():
     """Home page route."""
     return render_template('index.html', title='Home')
 
 @bp.route('/about')
+@cache.cached(unless=is_personalized)
 def about():
     """About page route."""
     return render_template('about.html', title='About')
@@ -20,6 +24,7 @@ def dashboard():
     return render_template('dashboard.html', title='Dashboard')
 
 @bp.route('/api/docs')
+@cache.cached(unless=is_personalized)
 def api_docs():
     """API documentation page."""
     return render_template('api_docs.html', title='API Documentation')
@@ -0,0 +1,111 @@
+"""
+Prometheus metrics for requests, the database connection pool and the
+entity cache.
+
+When PROMETHEUS_MULTIPROC_DIR is set (gunicorn_config.py does this), every
+worker writes its samples to memory-mapped files in that directory and
+/metrics aggregates all of them, so a scrape reflects the whole server no
+matter which worker answers it.
+
+The endpoint reveals routes, timings and process details. When
+METRICS_TOKEN is set, scrapers must send it as a bearer token; nginx only
+lets private networks reach it.
+"""
+import hmac
+import os
+import time
+from flask import Response, abort, current_app, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter,
+                               Gauge, Histogram, generate_latest, multiprocess)
+from sqlalchemy import event
+from sqlalchemy.pool import Pool
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint',
+    ['method', 'endpoint']
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Requests by endpoint and status code',
+    ['method', 'endpoint', 'status']
+)
+REQUEST_ERRORS = Counter(
+    'http_request_errors_total', 'Requests that ended in a 5xx response',
+    ['method', 'endpoint', 'status']
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    'http_requests_in_progress', 'Requests currently being handled',
+    multiprocess_mode='livesum'
+)
+ENTITY_CACHE_LOOKUPS = Counter(
+    'entity_cache_lookups_total', 'Entity cache lookups by entity and result',
+    ['entity', 'result']
+)
+DB_CONNECTIONS_OPEN = Gauge(
+    'db_pool_connections_open', 'Database connections held by the pool',
+    multiprocess_mode='livesum'
+)
+DB_CONNECTIONS_CHECKED_OUT = Gauge(
+    'db_pool_connections_checked_out', 'Database connections currently in use',
+    multiprocess_mode='livesum'
+)
+
+@event.listens_for(Pool, 'connect')
+def _on_connect(dbapi_connection, connection_record):
+    DB_CONNECTIONS_OPEN.inc()
+
+@event.listens_for(Pool, 'close')
+def _on_close(dbapi_connection, connection_record):
+    DB_CONNECTIONS_OPEN.dec()
+
+@event.listens_for(Pool, 'checkout')
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_CONNECTIONS_CHECKED_OUT.inc()
+
+@event.listens_for(Pool, 'checkin')
+def _on_checkin(dbapi_connection, connection_record):
+    DB_CONNECTIONS_CHECKED_OUT.dec()
+
+def _registry():
+    """Return the registry to expose: all workers' samples, or this process's."""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+def metrics():
+    """Expose metrics in the Prometheus text format."""
+    token = current_app.config['METRICS_TOKEN']
+    if token and not hmac.compare_digest(request.headers.get('Authorization', ''),
+                                         f'Bearer {token}'):
+        abort(401)
+    return Response(generate_latest(_registry()), mimetype=CONTENT_TYPE_LATEST)
+
+def init_app(app):
+    """Register the request hooks and the /metrics endpoint."""
+    if not app.config['METRICS_ENABLED']:
+        return
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.perf_counter()
+        REQUESTS_IN_PROGRESS.inc()
+
+    @app.after_request
+    def record_request_metrics(response):
+        start = g.get('metrics_start')
+        if start is not None:
+            # Unmatched URLs share one label to keep cardinality bounded
+            endpoint = request.endpoint or 'unmatched'
+            REQUEST_LATENCY.labels(request.method, endpoint).observe(time.perf_counter() - start)
+            REQUESTS.labels(request.method, endpoint, response.status_code).inc()
+            if response.status_code >= 500:
+                REQUEST_ERRORS.labels(request.method, endpoint, response.status_code).inc()
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        if g.pop('metrics_start', None) is not None:
+            REQUESTS_IN_PROGRESS.dec()
+
+    app.add_url_rule('/metrics', 'metrics', metrics)
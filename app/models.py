@@ -1,7 +1,7 @@
 from datetime import datetime, timezone
-from werkzeug.security import generate_password_hash, check_password_hash
 from flask_login import UserMixin
 from app import db, login_manager
+from app.hashing import hash_password, verify_password
 
 class User(UserMixin, db.Model):
     """User model for authentication."""
@@ -13,11 +13,17 @@ class User(UserMixin, db.Model):
     password_hash = db.Column(db.String(128))
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
+    version = db.Column(db.Integer, nullable=False)
 
     # Relationship with cascade delete
     posts = db.relationship('Post', backref='author', lazy='dynamic',
                            cascade='all, delete-orphan')
 
+    # Incremented on every UPDATE; used for ETags and optimistic locking
+    __mapper_args__ = {'version_id_col': version}
+
     def __init__(self, username, email, password, is_admin=False):
         self.username = username
         self.email = email
@@ -26,30 +32,43 @@ class User(UserMixin, db.Model):
 
     def set_password(self, password):
         """Set password hash."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         """Check password against hash."""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def __repr__(self):
         return f'<User {self.username}>'
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user by ID."""
-    return db.session.get(User, int(user_id))
+    """Load the identity of a logged-in user by ID."""
+    from app.identity import load_identity
+    return load_identity(int(user_id))
 
 # Example of another model
 class Post(db.Model):
     """Example post model."""
     __tablename__ = 'posts'
+    __table_args__ = (
+        # Sort key for keyset pagination of the posts collection
+        db.Index('ix_posts_created_at_id', 'created_at', 'id'),
+        # Posts by author, newest or oldest first
+        db.Index('ix_posts_user_id_created_at', 'user_id', 'created_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100))
     content = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc),
+                           onupdate=lambda: datetime.now(timezone.utc))
+    version = db.Column(db.Integer, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
 
+    # Incremented on every UPDATE; used for ETags and optimistic locking
+    __mapper_args__ = {'version_id_col': version}
+
     def __repr__(self):
         return f'<Post {self.title}>'
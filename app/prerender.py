@@ -0,0 +1,66 @@
+"""
+Prerendered HTML for pages that look the same to every anonymous visitor.
+
+`flask prerender` renders the PRERENDER_PAGES endpoints as an anonymous
+client would see them and writes them under PRERENDER_FOLDER, where nginx
+serves them to requests without a session or remember-me cookie. Those page
+views never reach a Python worker; logged-in users, and visitors with
+flashed messages waiting, still get the pages rendered by Flask.
+
+Paths map to files as nginx's try_files looks them up: '/' is written to
+index.html and '/api/docs' to api/docs.html. When compression is enabled,
+.gz/.br copies are written next to the pages as for static files.
+"""
+import os
+import click
+from flask import url_for
+from app.compression import compress_static
+
+def page_file(directory, path):
+    """Return the file a page path is prerendered to."""
+    name = path.strip('/') or 'index'
+    return os.path.join(directory, *name.split('/')) + '.html'
+
+def prerender(app, endpoints, directory):
+    """
+    Render pages anonymously and write them to directory.
+
+    Args:
+        app: The Flask application
+        endpoints (list): Endpoints of pages without URL parameters
+        directory (str): Folder the pages are written to
+
+    Returns:
+        list: Paths of the files written
+
+    Raises:
+        RuntimeError: If a page does not render with status 200
+    """
+    with app.test_request_context():
+        paths = [url_for(endpoint) for endpoint in endpoints]
+    client = app.test_client(use_cookies=False)
+    written = []
+    for path in paths:
+        response = client.get(path)
+        if response.status_code != 200:
+            raise RuntimeError(f'{path} returned {response.status}')
+        filename = page_file(directory, path)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'wb') as f:
+            f.write(response.get_data())
+        written.append(filename)
+    return written
+
+def init_app(app):
+    """Register the prerender command."""
+
+    @app.cli.command('prerender')
+    def prerender_command():
+        """Write the PRERENDER_PAGES as static HTML for nginx."""
+        directory = app.config['PRERENDER_FOLDER']
+        written = prerender(app, app.config['PRERENDER_PAGES'], directory)
+        if app.config['COMPRESSION_ENABLED']:
+            written += compress_static(directory, ['text/html'], app.config['COMPRESSION_MIN_SIZE'])
+        for path in written:
+            click.echo(f'Wrote {os.path.relpath(path, app.root_path)}')
+        click.echo(f'{len(written)} prerendered files written.')
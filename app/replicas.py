@@ -0,0 +1,167 @@
+"""
+Read-replica routing.
+
+Engines for DATABASE_REPLICA_URLS serve the reads of GET, HEAD and OPTIONS
+requests. Everything else goes to the primary:
+
+- requests with other methods, and work outside a request;
+- any statement that writes, and every statement after it in the request;
+- requests from a client that wrote recently: a write sets a short-lived
+  cookie so the client reads its own writes until replication catches up;
+- reads while no replica is healthy and within REPLICA_MAX_LAG.
+
+Requests that read from a replica set g.db_replica_read, so the response
+cache does not store what may be stale.
+
+Replicas are health-checked, and their lag measured, at most once per
+REPLICA_CHECK_INTERVAL, by whichever request needs one first.
+"""
+import logging
+import random
+import threading
+import time
+from flask import current_app, g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.dml import UpdateBase
+from app.engines import engine_options
+
+logger = logging.getLogger(__name__)
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Seconds a replica is behind; 0 when it has replayed everything it received
+_LAG_QUERIES = {
+    'postgresql': "SELECT CASE WHEN NOT pg_is_in_recovery() "
+                  "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                  "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END",
+}
+
+class Replica:
+    """A replica engine and the result of its last health check."""
+
+    def __init__(self, name, engine):
+        self.name = name
+        self.engine = engine
+        self.healthy = False
+        self.lag = None
+
+    def check(self):
+        """Connect, measure the replication lag and record the outcome."""
+        try:
+            with self.engine.connect() as connection:
+                query = _LAG_QUERIES.get(self.engine.dialect.name, 'SELECT 0')
+                self.lag = float(connection.execute(text(query)).scalar() or 0)
+            if not self.healthy:
+                logger.info(f"Replica {self.name} is available (lag {self.lag:.1f}s)")
+            self.healthy = True
+        except SQLAlchemyError as e:
+            if self.healthy:
+                logger.warning(f"Replica {self.name} failed its health check: {e}")
+            self.healthy = False
+
+class ReplicaRouter:
+    """Chooses a replica that is healthy and not too far behind."""
+
+    def __init__(self, replicas, max_lag, check_interval):
+        """
+        Args:
+            replicas (list): Replica instances
+            max_lag (float): Seconds of lag beyond which a replica is skipped
+            check_interval (float): Seconds between health checks
+        """
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._checked_at = None
+        self._lock = threading.Lock()
+
+    def refresh(self, force=False):
+        """Health-check the replicas if the last check is too old."""
+        now = time.monotonic()
+        if not force and self._checked_at is not None \
+                and now - self._checked_at < self.check_interval:
+            return
+        # One caller checks; the others keep using the previous results
+        if not self._lock.acquire(blocking=force):
+            return
+        try:
+            self._checked_at = now
+            for replica in self.replicas:
+                replica.check()
+        finally:
+            self._lock.release()
+
+    def choose(self):
+        """
+        Return the engine of a usable replica, picked at random.
+
+        Returns:
+            Engine or None: None if reads must go to the primary
+        """
+        self.refresh()
+        usable = [replica for replica in self.replicas
+                  if replica.healthy and replica.lag <= self.max_lag]
+        return random.choice(usable).engine if usable else None
+
+class RoutingSession(Session):
+    """Session that sends the reads of read-only requests to a replica."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if self._flushing or isinstance(clause, UpdateBase):
+                self._use_primary()
+            else:
+                replica = self._replica()
+                if replica is not None:
+                    if has_request_context():
+                        g.db_replica_read = True
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _use_primary(self):
+        """Send the rest of this request to the primary and mark the client."""
+        self.info['use_primary'] = True
+        if has_request_context():
+            g.db_wrote = True
+
+    def _replica(self):
+        """Return the replica engine for this session's reads, or None."""
+        if 'replica' in self.info:
+            return None if self.info.get('use_primary') else self.info['replica']
+        router = current_app.extensions.get('replica_router') if has_request_context() else None
+        if router is None or request.method not in READ_METHODS \
+                or request.cookies.get(current_app.config['REPLICA_STICKY_COOKIE']):
+            self.info['replica'] = None
+        else:
+            self.info['replica'] = router.choose()
+        return self._replica()
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    session._use_primary()
+
+def init_app(app):
+    """Set up replica routing if any replica URLs are configured."""
+    urls = app.config['DATABASE_REPLICA_URLS']
+    if not urls:
+        return
+    replicas = []
+    for i, url in enumerate(urls):
+        engine = create_engine(url, **engine_options(url, app.config))
+        if app.config['SQLITE_TUNING']:
+            from app.sqlite import tune_engine
+            tune_engine(engine, app.config)
+        replicas.append(Replica(f'replica_{i}', engine))
+    app.extensions['replica_router'] = ReplicaRouter(
+        replicas, app.config['REPLICA_MAX_LAG'], app.config['REPLICA_CHECK_INTERVAL'])
+
+    @app.after_request
+    def stick_to_primary(response):
+        """Keep a client that just wrote on the primary until replicas catch up."""
+        if g.get('db_wrote'):
+            response.set_cookie(app.config['REPLICA_STICKY_COOKIE'], '1',
+                                max_age=app.config['REPLICA_STICKY_SECONDS'],
+                                httponly=True, samesite='Lax')
+        return response
@@ -0,0 +1,125 @@
+"""
+Full-text search over posts.
+
+SQLite databases get an external-content FTS5 table kept in sync by
+triggers; PostgreSQL databases get a generated tsvector column with a GIN
+index. Both are created alongside the posts table by db.create_all(), and
+because the database maintains them, every write path (ORM, bulk insert or
+raw SQL) keeps the index current. Other databases fall back to LIKE.
+"""
+from contextlib import contextmanager
+from sqlalchemy import DDL, event, func, literal_column, or_, select, text
+from sqlalchemy.sql import column, table
+from app import db
+from app.models import Post
+
+# Relative weight of title matches over content matches
+TITLE_WEIGHT = 10.0
+
+_SQLITE_CREATE = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+    "title, content, content='posts', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN "
+    "INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF title, content ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content); "
+    "END",
+]
+
+_POSTGRESQL_CREATE = [
+    "ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)",
+]
+
+for statement in _SQLITE_CREATE:
+    event.listen(Post.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+for statement in _POSTGRESQL_CREATE:
+    event.listen(Post.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+# The FTS table is not part of the metadata, so drop it with the posts table
+event.listen(Post.__table__, 'before_drop',
+             DDL("DROP TABLE IF EXISTS posts_fts").execute_if(dialect='sqlite'))
+
+_SQLITE_TRIGGERS = ('posts_fts_insert', 'posts_fts_delete', 'posts_fts_update')
+
+@contextmanager
+def deferred_indexing():
+    """
+    Suspend search index maintenance around a bulk load of posts.
+
+    Updating the index row by row dominates the cost of large inserts, so
+    the SQLite triggers (or the PostgreSQL GIN index) are dropped for the
+    duration and the index is rebuilt in one pass afterwards. Runs in the
+    current session's transaction.
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for trigger in _SQLITE_TRIGGERS:
+            db.session.execute(text(f'DROP TRIGGER IF EXISTS {trigger}'))
+    elif dialect == 'postgresql':
+        db.session.execute(text('DROP INDEX IF EXISTS ix_posts_search_vector'))
+    yield
+    if dialect == 'sqlite':
+        for statement in _SQLITE_CREATE:
+            db.session.execute(text(statement))
+        db.session.execute(text("INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')"))
+    elif dialect == 'postgresql':
+        db.session.execute(text(_POSTGRESQL_CREATE[1]))
+
+def include_name(name, type_, parent_names):
+    """Keep Alembic autogenerate from dropping the search index objects."""
+    if type_ == 'table':
+        return not name.startswith('posts_fts')
+    return name not in ('search_vector', 'ix_posts_search_vector')
+
+def _fts5_query(terms):
+    """Quote each term so user input is never parsed as FTS5 syntax."""
+    return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+def search_posts(query, limit, offset=0):
+    """
+    Return posts matching query, best matches first.
+
+    Every term must match (in the title or content) for a post to be found.
+
+    Args:
+        query (str): Search terms as typed by the user
+        limit (int): Maximum number of posts to return
+        offset (int): Number of matching posts to skip
+
+    Returns:
+        list: Matching Post instances
+    """
+    terms = query.split()
+    if not terms:
+        return []
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect == 'sqlite':
+        fts = table('posts_fts', column('rowid'))
+        statement = select(Post).join(fts, fts.c.rowid == Post.id) \
+            .where(text('posts_fts MATCH :query').bindparams(query=_fts5_query(terms))) \
+            .order_by(text(f'bm25(posts_fts, {TITLE_WEIGHT}, 1.0)'), Post.id)
+    elif dialect == 'postgresql':
+        vector = literal_column('posts.search_vector')
+        tsquery = func.plainto_tsquery('english', ' '.join(terms))
+        statement = select(Post).where(vector.op('@@')(tsquery)) \
+            .order_by(func.ts_rank(vector, tsquery).desc(), Post.id)
+    else:
+        statement = select(Post).order_by(Post.id)
+        for term in terms:
+            pattern = f'%{term}%'
+            statement = statement.where(or_(Post.title.ilike(pattern),
+                                            Post.content.ilike(pattern)))
+
+    return db.session.scalars(statement.limit(limit).offset(offset)).all()
@@ -0,0 +1,131 @@
+"""
+SQLite tuning for single-node deployments.
+
+Every new SQLite connection gets the configured pragmas: WAL journaling lets
+readers proceed while a write is in progress, synchronous=NORMAL drops the
+fsync on every commit (WAL stays consistent; only the last transactions can
+be lost on power failure), and busy_timeout makes a writer wait for the lock
+instead of failing with "database is locked".
+
+SQLite allows one writer at a time. Writers in the same process are also
+queued on a lock here, so greenlets or threads take turns instead of
+spinning on SQLite's busy handler; SQLite's own lock still arbitrates
+between processes.
+"""
+import logging
+import os
+import re
+import threading
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_WRITE_STATEMENT = re.compile(r'\s*(INSERT|UPDATE|DELETE|REPLACE|CREATE|DROP|ALTER)\b', re.IGNORECASE)
+
+class WriteQueue:
+    """Lets one connection of this process at a time hold a write transaction."""
+
+    def __init__(self, timeout):
+        """
+        Args:
+            timeout (float): Seconds to wait for the queue before writing
+                anyway and leaving the wait to SQLite's busy handler
+        """
+        self.timeout = timeout
+        self._lock = None
+        self._pid = None
+        self._guard = threading.Lock()
+
+    def _process_lock(self):
+        """
+        Return this process's lock, creating it on first use.
+
+        The queue is built in create_app, which with preload_app runs in the
+        gunicorn master before gevent patches the workers. A lock made then
+        would be a real OS lock, and waiting on it would block the whole
+        worker rather than one greenlet; made on first use, it is a gevent
+        lock in gevent workers. Forked processes get a lock of their own.
+        """
+        pid = os.getpid()
+        if self._pid != pid:
+            # _guard is never held across a blocking call, so it is safe
+            # even when it predates the patching
+            with self._guard:
+                if self._pid != pid:
+                    self._lock = threading.Lock()
+                    self._pid = pid
+        return self._lock
+
+    def acquire(self, info):
+        """Take the write slot for the connection whose info dict is given."""
+        if info.get('sqlite_writer'):
+            return
+        lock = self._process_lock()
+        if not lock.acquire(timeout=self.timeout):
+            logger.warning(f"Waited {self.timeout}s for the SQLite write queue; writing anyway")
+            return
+        info['sqlite_writer'] = True
+
+    def release(self, info):
+        """Give up the write slot, if the connection holds it."""
+        if info.pop('sqlite_writer', False):
+            self._process_lock().release()
+
+def pragmas(config):
+    """Return the PRAGMA statements for the given configuration."""
+    statements = [
+        f"PRAGMA busy_timeout = {config['SQLITE_BUSY_TIMEOUT']}",
+        f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}",
+        f"PRAGMA cache_size = {config['SQLITE_CACHE_SIZE']}",
+        f"PRAGMA mmap_size = {config['SQLITE_MMAP_SIZE']}",
+        f"PRAGMA foreign_keys = {'ON' if config['SQLITE_FOREIGN_KEYS'] else 'OFF'}",
+    ]
+    if config['SQLITE_WAL']:
+        statements.insert(0, 'PRAGMA journal_mode = WAL')
+    return statements
+
+def tune_engine(engine, config):
+    """Apply the SQLite profile to an engine; other databases are left alone."""
+    if engine.dialect.name != 'sqlite':
+        return
+    statements = pragmas(config)
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+
+    if not config['SQLITE_WRITE_QUEUE']:
+        return
+    queue = WriteQueue(config['SQLITE_BUSY_TIMEOUT'] / 1000)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def queue_writes(conn, cursor, statement, parameters, context, executemany):
+        if _WRITE_STATEMENT.match(statement):
+            queue.acquire(conn.info)
+
+    @event.listens_for(engine, 'commit')
+    @event.listens_for(engine, 'rollback')
+    def end_transaction(conn):
+        queue.release(conn.info)
+
+    # Connections returned to the pool, or discarded, mid-transaction
+    @event.listens_for(engine, 'reset')
+    def reset_connection(dbapi_connection, connection_record, reset_state):
+        queue.release(connection_record.info)
+
+    @event.listens_for(engine, 'invalidate')
+    def invalidate_connection(dbapi_connection, connection_record, exception):
+        queue.release(connection_record.info)
+
+def init_app(app, db):
+    """Tune the application's SQLite engines, if SQLITE_TUNING is on."""
+    if not app.config['SQLITE_TUNING']:
+        return
+    with app.app_context():
+        for engine in db.engines.values():
+            tune_engine(engine, app.config)
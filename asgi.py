@@ -0,0 +1,10 @@
+"""
+ASGI entry point for the async API (app.aio).
+
+Usage:
+    uvicorn asgi:app --workers 4
+"""
+import os
+from app.aio import create_asgi_app
+
+app = create_asgi_app(os.getenv('FLASK_CONFIG', 'default'))
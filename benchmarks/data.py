@@ -0,0 +1,51 @@
+"""
+Deterministic benchmark datasets, generated with init_db.generate_data.
+"""
+from dataclasses import dataclass
+from datetime import timedelta
+from app import create_app, db
+from config import config
+from init_db import SYNTHETIC_EPOCH, SYNTHETIC_PASSWORD, generate_data
+
+PASSWORD = SYNTHETIC_PASSWORD
+
+@dataclass
+class Dataset:
+    """Shape of a generated database, as needed to build requests against it."""
+    users: int
+    posts: int
+
+    def username(self, n):
+        return f'user{n}'
+
+    def post_created_at(self, post_id):
+        return SYNTHETIC_EPOCH + timedelta(seconds=post_id)
+
+    def post_author(self, post_id):
+        return (post_id - 1) % self.users + 1
+
+def make_app(config_name, database_url, **overrides):
+    """Create the application for config_name, using database_url and overrides."""
+    name = f'benchmark-{config_name}'
+    config[name] = type('BenchmarkConfig', (config[config_name],),
+                        {'SQLALCHEMY_DATABASE_URI': database_url, **overrides})
+    return create_app(name)
+
+def seed(app, posts, posts_per_user=100):
+    """
+    Recreate the schema and fill it with a deterministic dataset.
+
+    Args:
+        app: Application whose database is replaced
+        posts (int): Approximate number of posts to create
+        posts_per_user (int): Posts per user; sets the user count
+
+    Returns:
+        Dataset: Description of the generated data
+    """
+    users = max(10, posts // posts_per_user)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        users, posts = generate_data(users, max(1, posts // users))
+    return Dataset(users=users, posts=posts)
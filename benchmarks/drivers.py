@@ -0,0 +1,119 @@
+"""
+Ways of sending benchmark requests to the application.
+
+A driver hands out clients, one per benchmark thread. A client's request()
+sends one request, reads the whole body and returns (status code, body).
+"""
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class TestClientDriver:
+    """Calls the application in-process through Flask's test client."""
+
+    name = 'testclient'
+
+    def __init__(self, app):
+        self.app = app
+
+    def client(self):
+        return _TestClient(self.app.test_client())
+
+    def stop(self):
+        pass
+
+class _TestClient:
+    def __init__(self, client):
+        self._client = client
+
+    def request(self, method, path, headers=None, body=None):
+        response = self._client.open(path, method=method, headers=headers, data=body)
+        body = response.get_data()
+        response.close()
+        return response.status_code, body
+
+class GunicornDriver:
+    """Launches gunicorn with gunicorn_config.py and talks HTTP to it."""
+
+    name = 'gunicorn'
+
+    def __init__(self, config_name, database_url, workers=None, port=8765,
+                 startup_timeout=30):
+        """
+        Args:
+            config_name (str): FLASK_CONFIG for the server
+            database_url (str): DATABASE_URL for the server
+            workers (int): Worker processes, defaults to gunicorn_config.py's
+            port (int): Local port to bind
+            startup_timeout (int): Seconds to wait for the server to listen
+        """
+        self.host, self.port = '127.0.0.1', port
+        env = dict(os.environ, FLASK_CONFIG=config_name, DATABASE_URL=database_url,
+                   GUNICORN_BIND=f'{self.host}:{port}',
+                   GUNICORN_ACCESS_LOG=os.devnull)
+        if workers:
+            env['GUNICORN_WORKERS'] = str(workers)
+        self.process = subprocess.Popen(self.command(workers), cwd=PROJECT_ROOT, env=env)
+        self._wait_until_listening(startup_timeout)
+
+    def command(self, workers):
+        return [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn_config.py', 'wsgi:app']
+
+    def _wait_until_listening(self, timeout):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f'{self.name} exited with status {self.process.returncode}')
+            try:
+                socket.create_connection((self.host, self.port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.2)
+        self.stop()
+        raise RuntimeError(f'{self.name} did not listen on port {self.port} within {timeout}s')
+
+    def client(self):
+        return _HTTPClient(self.host, self.port)
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+class UvicornDriver(GunicornDriver):
+    """Launches the async API (asgi.py) under uvicorn and talks HTTP to it."""
+
+    name = 'uvicorn'
+
+    def command(self, workers):
+        return [sys.executable, '-m', 'uvicorn', 'asgi:app', '--host', self.host,
+                '--port', str(self.port), '--workers', str(workers or 1),
+                '--no-access-log', '--log-level', 'warning']
+
+class _HTTPClient:
+    """Keep-alive HTTP client that reconnects when the server drops it."""
+
+    def __init__(self, host, port):
+        self._connection = http.client.HTTPConnection(host, port, timeout=60)
+
+    def request(self, method, path, headers=None, body=None):
+        try:
+            return self._send(method, path, headers, body)
+        except (http.client.HTTPException, ConnectionError):
+            # Workers recycled by max_requests close idle connections
+            self._connection.close()
+            return self._send(method, path, headers, body)
+
+    def _send(self, method, path, headers, body):
+        self._connection.request(method, path, body=body, headers=headers or {})
+        response = self._connection.getresponse()
+        return response.status, response.read()
@@ -0,0 +1,200 @@
+"""
+HTTP load test for the API.
+
+Seeds a database of the requested size, runs each scenario against the
+application through the Flask test client (in-process), a local gunicorn
+started with gunicorn_config.py or the async API (asgi.py) under uvicorn,
+and writes latency percentiles and
+throughput to a JSON file. Results record the git commit, so files from
+different commits can be compared with --compare.
+
+Usage:
+    python -m benchmarks.load [--driver testclient|gunicorn|uvicorn] [--rows 10000,100000]
+                              [--scenarios post_reads,list_posts] [--requests 1000]
+                              [--concurrency 8] [--output results.json]
+                              [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from benchmarks.data import make_app, seed
+from benchmarks.drivers import PROJECT_ROOT, GunicornDriver, TestClientDriver, UvicornDriver
+from benchmarks.scenarios import SCENARIOS
+
+def percentile(sorted_values, fraction):
+    """Return the value at fraction (0-1) of sorted_values, nearest-rank."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(latencies, errors, elapsed):
+    """Reduce per-request latencies (seconds) to the reported figures."""
+    latencies = sorted(latencies)
+    ms = lambda value: None if value is None else round(value * 1000, 3)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'latency_ms': {
+            'p50': ms(percentile(latencies, 0.50)),
+            'p95': ms(percentile(latencies, 0.95)),
+            'p99': ms(percentile(latencies, 0.99)),
+            'mean': ms(sum(latencies) / len(latencies)) if latencies else None,
+            'max': ms(latencies[-1]) if latencies else None,
+        },
+    }
+
+def run_scenario(driver, scenario, dataset, requests, concurrency, warmup, seed_value=0):
+    """
+    Send requests (split across concurrency threads) for one scenario.
+
+    Returns:
+        dict: Summary as produced by summarize()
+    """
+    state = scenario.prepare(driver.client(), dataset)
+    latencies, errors, lock = [], [0], threading.Lock()
+
+    def worker(index, count):
+        client = driver.client()
+        rng = random.Random(seed_value * 1000 + index)
+        for _ in range(warmup):
+            request = scenario.next_request(state, dataset, rng)
+            client.request(request.method, request.path, request.headers, request.body)
+        start_barrier.wait()
+        own, failed = [], 0
+        for _ in range(count):
+            request = scenario.next_request(state, dataset, rng)
+            start = time.perf_counter()
+            status, _ = client.request(request.method, request.path,
+                                       request.headers, request.body)
+            own.append(time.perf_counter() - start)
+            failed += status != request.expected
+        with lock:
+            latencies.extend(own)
+            errors[0] += failed
+
+    counts = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    start_barrier = threading.Barrier(concurrency + 1)
+    threads = [threading.Thread(target=worker, args=(i, count)) for i, count in enumerate(counts)]
+    for thread in threads:
+        thread.start()
+    start_barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - start)
+
+def git_revision():
+    """Return (commit, dirty) for the working tree, or (None, None) outside git."""
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_ROOT,
+                                         stderr=subprocess.DEVNULL, text=True).strip()
+        status = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'],
+                                         cwd=PROJECT_ROOT, text=True)
+        return commit, bool(status.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+def compare(results, baseline):
+    """Print the change of each run against the matching run in baseline."""
+    previous = {(run['rows'], run['scenario']): run for run in baseline['runs']}
+    print(f"\nCompared with {(baseline.get('commit') or 'unknown')[:10]}:")
+    for run in results['runs']:
+        before = previous.get((run['rows'], run['scenario']))
+        if before is None:
+            continue
+        changes = []
+        for label, now, then in (('rps', run['rps'], before['rps']),
+                                 ('p95', run['latency_ms']['p95'], before['latency_ms']['p95']),
+                                 ('p99', run['latency_ms']['p99'], before['latency_ms']['p99'])):
+            if now and then:
+                changes.append(f'{label} {(now - then) / then:+.1%}')
+        print(f"{run['scenario']:>16} @ {run['rows']:<9,} {', '.join(changes)}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the API')
+    parser.add_argument('--driver', choices=('testclient', 'gunicorn', 'uvicorn'),
+                        default='testclient',
+                        help='Run in-process, against a local gunicorn or against the '
+                             'async API under uvicorn (default: testclient)')
+    parser.add_argument('--config', default='production',
+                        help='Application configuration to benchmark (default: production)')
+    parser.add_argument('--rows', default='10000',
+                        help='Comma-separated dataset sizes in posts (default: 10000)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"Comma-separated scenarios (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument('--requests', type=int, default=1000,
+                        help='Measured requests per scenario (default: 1000)')
+    parser.add_argument('--warmup', type=int, default=20,
+                        help='Unmeasured requests per thread before each scenario (default: 20)')
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help='Concurrent clients (default: 4)')
+    parser.add_argument('--workers', type=int,
+                        help='Server worker processes (default: gunicorn_config.py\'s for '
+                             'gunicorn, 1 for uvicorn)')
+    parser.add_argument('--port', type=int, default=8765,
+                        help='Port for the gunicorn and uvicorn drivers (default: 8765)')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/<commit>.json)')
+    parser.add_argument('--compare', help='Earlier results file to compare against')
+    args = parser.parse_args()
+
+    scenarios = [SCENARIOS[name] for name in args.scenarios.split(',')]
+    commit, dirty = git_revision()
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'driver': args.driver,
+        'config': args.config,
+        'concurrency': args.concurrency,
+        'workers': args.workers,
+        'runs': [],
+    }
+
+    with tempfile.TemporaryDirectory(prefix='pythonweb-bench-') as directory:
+        for rows in (int(value) for value in args.rows.split(',')):
+            database_url = 'sqlite:///' + os.path.join(directory, f'bench-{rows}.db')
+            app = make_app(args.config, database_url)
+            print(f'Seeding {rows:,} posts...')
+            dataset = seed(app, rows)
+            if args.driver == 'gunicorn':
+                driver = GunicornDriver(args.config, database_url, args.workers, args.port)
+            elif args.driver == 'uvicorn':
+                driver = UvicornDriver(args.config, database_url, args.workers, args.port)
+            else:
+                driver = TestClientDriver(app)
+            try:
+                for scenario in scenarios:
+                    summary = run_scenario(driver, scenario, dataset, args.requests,
+                                           args.concurrency, args.warmup)
+                    results['runs'].append({'rows': rows, 'scenario': scenario.name, **summary})
+                    latency = summary['latency_ms']
+                    print(f"{scenario.name:>16} @ {rows:<9,} {summary['rps']:>9,.1f} req/s  "
+                          f"p50 {latency['p50']:.2f}ms  p95 {latency['p95']:.2f}ms  "
+                          f"p99 {latency['p99']:.2f}ms  errors {summary['errors']}")
+            finally:
+                driver.stop()
+
+    output = args.output or os.path.join(PROJECT_ROOT, 'benchmarks', 'results',
+                                         f"{(commit or 'unknown')[:10]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'Results written to {output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+
+if __name__ == '__main__':
+    main()
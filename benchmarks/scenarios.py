@@ -0,0 +1,107 @@
+"""
+Scripted benchmark scenarios.
+
+A scenario's prepare() runs once against the freshly seeded server (e.g. to
+obtain a token) and returns shared state; next_request() then builds each
+request from that state and a per-thread random generator.
+"""
+import base64
+import json
+from app.api.pagination import encode_cursor
+from benchmarks.data import PASSWORD
+
+API = '/api/v1'
+
+class Request:
+    """One request and the status code that counts as success."""
+
+    __slots__ = ('method', 'path', 'headers', 'body', 'expected')
+
+    def __init__(self, method, path, headers=None, body=None, expected=200):
+        self.method = method
+        self.path = path
+        self.headers = headers
+        self.body = body
+        self.expected = expected
+
+def basic_auth(username, password=PASSWORD):
+    credentials = base64.b64encode(f'{username}:{password}'.encode()).decode('ascii')
+    return {'Authorization': f'Basic {credentials}'}
+
+def fetch_token(client, username):
+    """Obtain a bearer token through the API, as a client would."""
+    status, body = client.request('POST', f'{API}/tokens', headers=basic_auth(username))
+    if status != 201:
+        raise RuntimeError(f'Could not obtain a token for {username}: HTTP {status}')
+    return {'Authorization': f"Bearer {json.loads(body)['token']}"}
+
+class Scenario:
+    name = None
+    description = None
+
+    def prepare(self, client, dataset):
+        return None
+
+    def next_request(self, state, dataset, rng):
+        raise NotImplementedError
+
+class PostReads(Scenario):
+    name = 'post_reads'
+    description = 'Anonymous GET of random posts'
+
+    def next_request(self, state, dataset, rng):
+        return Request('GET', f'{API}/posts/{rng.randint(1, dataset.posts)}')
+
+class PostWrites(Scenario):
+    name = 'post_writes'
+    description = 'Authenticated POST of new posts with a bearer token'
+
+    def prepare(self, client, dataset):
+        return [(n, fetch_token(client, dataset.username(n))) for n in range(1, 11)]
+
+    def next_request(self, state, dataset, rng):
+        user_id, headers = rng.choice(state)
+        headers = dict(headers, **{'Content-Type': 'application/json'})
+        body = json.dumps({'title': 'Benchmark write',
+                           'content': 'Written during a benchmark run.',
+                           'user_id': user_id})
+        return Request('POST', f'{API}/posts', headers=headers, body=body, expected=201)
+
+class LoginStorm(Scenario):
+    name = 'login_storm'
+    description = 'Token requests with Basic auth; each one verifies a password'
+
+    def next_request(self, state, dataset, rng):
+        username = dataset.username(rng.randint(1, dataset.users))
+        return Request('POST', f'{API}/tokens', headers=basic_auth(username), expected=201)
+
+class ListPosts(Scenario):
+    name = 'list_posts'
+    description = 'Pages of 100 posts starting at random cursors'
+
+    def next_request(self, state, dataset, rng):
+        post_id = rng.randint(1, dataset.posts)
+        cursor = encode_cursor([dataset.post_created_at(post_id), post_id])
+        return Request('GET', f'{API}/posts?limit=100&after={cursor}')
+
+class ListUserPosts(Scenario):
+    name = 'list_user_posts'
+    description = "Pages of 100 of a random user's posts"
+
+    def next_request(self, state, dataset, rng):
+        return Request('GET', f'{API}/users/{rng.randint(1, dataset.users)}/posts?limit=100')
+
+class ListUsers(Scenario):
+    name = 'list_users'
+    description = 'Pages of 100 users starting at random cursors, with a bearer token'
+
+    def prepare(self, client, dataset):
+        return fetch_token(client, dataset.username(1))
+
+    def next_request(self, state, dataset, rng):
+        cursor = encode_cursor([rng.randint(1, dataset.users)])
+        return Request('GET', f'{API}/users?limit=100&after={cursor}', headers=state)
+
+SCENARIOS = {scenario.name: scenario for scenario in (
+    PostReads(), PostWrites(), LoginStorm(), ListPosts(), ListUserPosts(), ListUsers()
+)}
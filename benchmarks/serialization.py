@@ -0,0 +1,81 @@
+"""
+Benchmark list-endpoint serialization throughput.
+
+Compares the hand-built dicts with per-item url_for calls that the API used
+to produce against the compiled serializers, each encoded with Flask's
+default JSON provider and with orjson (when installed). Encoding goes
+through provider.response(), as jsonify() does.
+
+Usage:
+    python -m benchmarks.serialization [--items 10000] [--repeat 5]
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+from flask import url_for
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from app.api.serializers import POST_ITEM_LINKS, post_serializer
+from app.json_provider import OrjsonProvider, orjson
+from app.models import Post
+
+def make_posts(count):
+    """Build transient Post objects; no database is involved."""
+    created_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [Post(id=i, title=f'Post {i}', content='Lorem ipsum dolor sit amet. ' * 10,
+                 created_at=created_at, user_id=i % 100 + 1)
+            for i in range(1, count + 1)]
+
+def legacy_dump(posts):
+    """The per-item dict literal and url_for calls the API used to build."""
+    return [{
+        'id': post.id,
+        'title': post.title,
+        'content': post.content,
+        'created_at': post.created_at.isoformat() + 'Z',
+        'user_id': post.user_id,
+        '_links': {
+            'self': url_for('api.get_post', id=post.id),
+            'author': url_for('api.get_user', id=post.user_id)
+        }
+    } for post in posts]
+
+def compiled_dump(posts):
+    """The compiled post serializer."""
+    return post_serializer.dump_many(posts, links=POST_ITEM_LINKS)
+
+def measure(dump, provider, posts, repeat):
+    """Return the best items/second over repeat runs of dump + encode."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        provider.response({'items': dump(posts)})
+        best = min(best, time.perf_counter() - start)
+    return len(posts) / best
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark API serialization')
+    parser.add_argument('--items', type=int, default=10000,
+                        help='Number of posts per list (default: 10000)')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Runs per scenario; the best one is reported (default: 5)')
+    args = parser.parse_args()
+
+    app = create_app('testing')
+    posts = make_posts(args.items)
+    providers = [('json', DefaultJSONProvider(app))]
+    if orjson is not None:
+        providers.append(('orjson', OrjsonProvider(app)))
+
+    with app.test_request_context():
+        assert legacy_dump(posts[:10]) == compiled_dump(posts[:10])
+        baseline = None
+        for dump_name, dump in (('legacy', legacy_dump), ('compiled', compiled_dump)):
+            for provider_name, provider in providers:
+                rate = measure(dump, provider, posts, args.repeat)
+                baseline = baseline or rate
+                print(f"{dump_name:>8} + {provider_name:<6} {rate:12,.0f} items/s "
+                      f"({rate / baseline:.1f}x)")
+
+if __name__ == '__main__':
+    main()
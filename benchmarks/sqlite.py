@@ -0,0 +1,110 @@
+"""
+Benchmark concurrent reads and writes against SQLite.
+
+Several processes (standing in for gunicorn workers), each with several
+threads, read and write posts through the ORM for a fixed time. Each SQLite
+profile runs against a fresh database; failed operations (e.g. "database is
+locked") are counted as errors.
+
+Usage:
+    python -m benchmarks.sqlite [--processes 4] [--threads 4] [--duration 5]
+                                [--write-ratio 0.2]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+from sqlalchemy.exc import OperationalError
+
+PROFILES = {
+    'sqlite defaults': {'SQLITE_TUNING': False},
+    'tuned, no write queue': {'SQLITE_TUNING': True, 'SQLITE_WRITE_QUEUE': False},
+    'tuned': {'SQLITE_TUNING': True, 'SQLITE_WRITE_QUEUE': True},
+}
+
+def run_worker(database_url, overrides, threads, duration, write_ratio, seed_value):
+    """Run one process's threads; returns (reads, writes, errors)."""
+    from app import db
+    from app.models import Post
+    from benchmarks.data import make_app
+
+    app = make_app('production', database_url, SQL_INSTRUMENTATION=False,
+                   SLOW_QUERY_THRESHOLD=0, **overrides)
+    with app.app_context():
+        posts = db.session.query(db.func.max(Post.id)).scalar()
+    totals = [0, 0, 0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def thread(index):
+        rng = random.Random(seed_value * 100 + index)
+        reads = writes = errors = 0
+        with app.app_context():
+            while time.monotonic() < deadline:
+                try:
+                    if rng.random() < write_ratio:
+                        db.session.add(Post(title='Benchmark write', content='Concurrent write',
+                                            user_id=1))
+                        db.session.commit()
+                        writes += 1
+                    else:
+                        db.session.get(Post, rng.randint(1, posts))
+                        db.session.query(Post).order_by(Post.created_at.desc()).limit(20).all()
+                        db.session.rollback()
+                        reads += 1
+                except OperationalError:
+                    db.session.rollback()
+                    errors += 1
+        with lock:
+            totals[0] += reads
+            totals[1] += writes
+            totals[2] += errors
+
+    workers = [threading.Thread(target=thread, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return tuple(totals)
+
+def run_profile(name, overrides, args, directory):
+    """Seed a database for one profile and drive it from several processes."""
+    from benchmarks.data import make_app, seed
+
+    database_url = 'sqlite:///' + os.path.join(directory, f"{name.replace(' ', '_')}.db")
+    seed(make_app('production', database_url, **overrides), args.rows)
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(args.processes) as pool:
+        results = pool.starmap(run_worker, [
+            (database_url, overrides, args.threads, args.duration, args.write_ratio, i)
+            for i in range(args.processes)
+        ])
+    reads, writes, errors = (sum(column) for column in zip(*results))
+    print(f"{name:>22}: {reads / args.duration:9,.0f} reads/s  "
+          f"{writes / args.duration:8,.0f} writes/s  {errors:6,} errors")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SQLite concurrency')
+    parser.add_argument('--processes', type=int, default=4,
+                        help='Worker processes (default: 4)')
+    parser.add_argument('--threads', type=int, default=4,
+                        help='Threads per process (default: 4)')
+    parser.add_argument('--duration', type=float, default=5,
+                        help='Seconds per profile (default: 5)')
+    parser.add_argument('--write-ratio', type=float, default=0.2,
+                        help='Fraction of operations that write (default: 0.2)')
+    parser.add_argument('--rows', type=int, default=10000,
+                        help='Posts in the database (default: 10000)')
+    args = parser.parse_args()
+
+    print(f'{args.processes} processes x {args.threads} threads, '
+          f'{args.write_ratio:.0%} writes, {args.duration:g}s per profile')
+    with tempfile.TemporaryDirectory(prefix='pythonweb-sqlite-') as directory:
+        for name, overrides in PROFILES.items():
+            run_profile(name, overrides, args, directory)
+
+if __name__ == '__main__':
+    main()
@@ -41,8 +41,117 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'app.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Async API (asgi.py); derived from DATABASE_URL with the aiosqlite or
+    # asyncpg driver unless set
+    ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
     DB_PORT = int(os.environ.get('DB_PORT') or 5432)  # Default PostgreSQL port
 
+    # Connection pool, per process. Under gunicorn, gunicorn_config.py derives
+    # DB_POOL_SIZE and DB_MAX_OVERFLOW from DB_MAX_CONNECTIONS, the number of
+    # workers and worker_connections unless they are set explicitly.
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 5)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+    DB_POOL_TIMEOUT = int(os.environ.get('DB_POOL_TIMEOUT') or 10)  # Seconds to wait for a connection
+    DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE') or 1800)  # Seconds before reconnecting
+    DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'True').lower() in ('true', '1', 't')
+    # Options for every engine. DB_POOL_SIZE, DB_MAX_OVERFLOW and
+    # DB_POOL_TIMEOUT are added per engine when its pool is a QueuePool
+    # (see app/engines.py), which excludes in-memory SQLite.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+
+    # Read replicas: comma-separated URLs. Reads of GET requests go to a
+    # healthy replica; writes, and a client's reads for REPLICA_STICKY_SECONDS
+    # after it wrote, go to the primary.
+    DATABASE_REPLICA_URLS = [url.strip() for url in
+                             (os.environ.get('DATABASE_REPLICA_URLS') or '').split(',') if url.strip()]
+    REPLICA_MAX_LAG = float(os.environ.get('REPLICA_MAX_LAG') or 5)  # Seconds
+    REPLICA_CHECK_INTERVAL = float(os.environ.get('REPLICA_CHECK_INTERVAL') or 10)  # Seconds
+    REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS') or 10)
+    REPLICA_STICKY_COOKIE = 'db_primary'
+
+    # SQLite profile, applied to every new SQLite connection
+    SQLITE_TUNING = os.environ.get('SQLITE_TUNING', 'True').lower() in ('true', '1', 't')
+    SQLITE_WAL = os.environ.get('SQLITE_WAL', 'True').lower() in ('true', '1', 't')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS') or 'NORMAL'
+    SQLITE_CACHE_SIZE = int(os.environ.get('SQLITE_CACHE_SIZE') or -32000)  # Pages, or KiB if negative
+    SQLITE_MMAP_SIZE = int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))  # Bytes
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 5000)  # Milliseconds
+    SQLITE_FOREIGN_KEYS = os.environ.get('SQLITE_FOREIGN_KEYS', 'True').lower() in ('true', '1', 't')
+    # Queue writers within each process instead of contending for SQLite's lock
+    SQLITE_WRITE_QUEUE = os.environ.get('SQLITE_WRITE_QUEUE', 'True').lower() in ('true', '1', 't')
+
+    # Query instrumentation (Server-Timing header and per-request query logging)
+    SQL_INSTRUMENTATION = os.environ.get('SQL_INSTRUMENTATION', 'True').lower() in ('true', '1', 't')
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD') or 10)
+
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True').lower() in ('true', '1', 't')
+    # Bearer token scrapers must send when set
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+
+    # Slow-query log; a threshold of 0 disables it
+    SLOW_QUERY_THRESHOLD = float(os.environ.get('SLOW_QUERY_THRESHOLD') or 0.5)  # Seconds
+    SLOW_QUERY_LOG_INTERVAL = int(os.environ.get('SLOW_QUERY_LOG_INTERVAL') or 60)  # Seconds per statement
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'True').lower() in ('true', '1', 't')
+
+    # API settings
+    API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE') or 20)
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE') or 100)
+    API_STREAM_BATCH_SIZE = int(os.environ.get('API_STREAM_BATCH_SIZE') or 1000)
+    API_TOKEN_EXPIRATION = int(os.environ.get('API_TOKEN_EXPIRATION') or 3600)  # Seconds
+    API_MAX_BATCH_SIZE = int(os.environ.get('API_MAX_BATCH_SIZE') or 5000)
+    # Encode JSON with orjson when it is installed
+    JSON_FAST_ENCODER = os.environ.get('JSON_FAST_ENCODER', 'True').lower() in ('true', '1', 't')
+
+    # Identities of logged-in users, cached per process (and optionally in
+    # the response cache backend) so page views skip the users table
+    IDENTITY_CACHE = os.environ.get('IDENTITY_CACHE', 'True').lower() in ('true', '1', 't')
+    IDENTITY_CACHE_SIZE = int(os.environ.get('IDENTITY_CACHE_SIZE') or 10000)
+    IDENTITY_CACHE_TTL = float(os.environ.get('IDENTITY_CACHE_TTL') or 30)  # Seconds
+    IDENTITY_CACHE_SHARED = os.environ.get('IDENTITY_CACHE_SHARED', 'False').lower() in ('true', '1', 't')
+    IDENTITY_CACHE_SHARED_TTL = int(os.environ.get('IDENTITY_CACHE_SHARED_TTL') or 300)  # Seconds
+
+    # Primary-key loads of users and posts, cached per process (L1) and
+    # optionally in the response cache backend (L2)
+    ENTITY_CACHE = os.environ.get('ENTITY_CACHE', 'True').lower() in ('true', '1', 't')
+    ENTITY_CACHE_SIZE = int(os.environ.get('ENTITY_CACHE_SIZE') or 10000)
+    ENTITY_CACHE_TTL = float(os.environ.get('ENTITY_CACHE_TTL') or 30)  # Seconds
+    ENTITY_CACHE_SHARED = os.environ.get('ENTITY_CACHE_SHARED', 'False').lower() in ('true', '1', 't')
+    ENTITY_CACHE_SHARED_TTL = int(os.environ.get('ENTITY_CACHE_SHARED_TTL') or 300)  # Seconds
+    # Concurrent misses for one entity share a single load; followers wait
+    # up to the timeout. SHARED_LOCK extends this across processes via L2.
+    ENTITY_CACHE_COALESCE = os.environ.get('ENTITY_CACHE_COALESCE', 'True').lower() in ('true', '1', 't')
+    ENTITY_CACHE_COALESCE_TIMEOUT = int(os.environ.get('ENTITY_CACHE_COALESCE_TIMEOUT') or 2)  # Seconds
+    ENTITY_CACHE_SHARED_LOCK = os.environ.get('ENTITY_CACHE_SHARED_LOCK', 'False').lower() in ('true', '1', 't')
+
+    # Response compression (brotli when installed, else gzip)
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'True').lower() in ('true', '1', 't')
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE') or 500)  # Bytes
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL') or 6)  # 1-9
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY') or 4)  # 0-11
+    COMPRESSION_MIMETYPES = [mimetype.strip() for mimetype in (
+        os.environ.get('COMPRESSION_MIMETYPES') or
+        'application/json,text/html,text/css,text/plain,text/javascript,'
+        'application/javascript,image/svg+xml').split(',') if mimetype.strip()]
+
+    # Manifest of content-hashed static files written by `flask fingerprint-static`
+    STATIC_MANIFEST = os.environ.get('STATIC_MANIFEST') or os.path.join(basedir, 'app', 'static-manifest.json')
+
+    # Pages written as static HTML by `flask prerender`, served by nginx to
+    # anonymous visitors
+    PRERENDER_PAGES = ['main.index', 'main.about', 'main.api_docs']
+    PRERENDER_FOLDER = os.environ.get('PRERENDER_FOLDER') or os.path.join(basedir, 'app', 'prerendered')
+    # Seconds template fragments stay in the response cache ({% cache %} tags)
+    FRAGMENT_CACHE_TIMEOUT = int(os.environ.get('FRAGMENT_CACHE_TIMEOUT') or 300)
+
+    # Password hashing settings
+    # Werkzeug method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'.
+    # Changing it only affects newly set passwords.
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+
     # Mail settings
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 25)
@@ -51,10 +160,24 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     ADMINS = ['your-email@example.com']
 
-    # Redis settings (for potential future use with caching/sessions)
+    # Redis settings (used by the RedisCache backend)
     REDIS_HOST = os.environ.get('REDIS_HOST') or 'localhost'
     REDIS_PORT = int(os.environ.get('REDIS_PORT') or 6379)
 
+    # Response cache settings (Flask-Caching)
+    # CACHE_TYPE is 'SimpleCache' (per process), 'FileSystemCache' or 'RedisCache'.
+    # Writes invalidate cached responses only in the backend of the process
+    # making them, so SimpleCache is refused when WORKER_PROCESSES > 1.
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'SimpleCache'
+    CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT') or 300)
+    CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX') or 'pythonweb:'
+    CACHE_DIR = os.environ.get('CACHE_DIR') or os.path.join(basedir, 'cache')
+    CACHE_REDIS_HOST = REDIS_HOST
+    CACHE_REDIS_PORT = REDIS_PORT
+
+    # Number of processes serving the app; set by gunicorn_config.py
+    WORKER_PROCESSES = int(os.environ.get('WORKER_PROCESSES') or 1)
+
 class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
@@ -65,12 +188,16 @@ class TestingConfig(Config):
     TESTING = True
     SERVER_PORT = int(os.environ.get('TEST_SERVER_PORT') or 5001)  # Different port for testing
     SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'test.db')
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'  # Cheap hashing keeps the suite fast
+    CACHE_TYPE = 'NullCache'  # Tests write to the database directly
+    STATIC_MANIFEST = os.path.join(basedir, 'tests', 'no-static-manifest.json')  # Link unhashed files whatever was deployed
 
 class ProductionConfig(Config):
     """Production configuration."""
     DEBUG = False
     SERVER_HOST = os.environ.get('PROD_SERVER_HOST') or '0.0.0.0'  # Bind to all interfaces
     SERVER_PORT = int(os.environ.get('PROD_SERVER_PORT') or 8000)  # Use a different port for production
+    CACHE_TYPE = os.environ.get('CACHE_TYPE') or 'RedisCache'  # Shared by all workers
 
     # Use Gunicorn/uWSGI in production
     WSGI_SERVER_PORT = int(os.environ.get('WSGI_SERVER_PORT') or 8000)
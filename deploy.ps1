@@ -70,6 +70,16 @@ if ($Build) {
 Write-Host "Starting the application in $Env environment..."
 docker-compose -f $ComposeFile up -d
 
+# Fingerprint and precompress static files and prerender anonymous pages for nginx
+Write-Host "Fingerprinting static files..."
+docker-compose -f $ComposeFile exec web flask --app wsgi fingerprint-static
+Write-Host "Precompressing static files..."
+docker-compose -f $ComposeFile exec web flask --app wsgi compress-static
+Write-Host "Prerendering pages..."
+docker-compose -f $ComposeFile exec web flask --app wsgi prerender
+# Workers read the static manifest when they start
+docker-compose -f $ComposeFile restart web
+
 # Run database migrations if requested
 if ($Migrate) {
     Write-Host "Running database migrations..."
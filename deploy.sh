@@ -93,6 +93,16 @@ fi
 echo "Starting the application in $ENV environment..."
 docker-compose -f "$COMPOSE_FILE" up -d
 
+# Fingerprint and precompress static files and prerender anonymous pages for nginx
+echo "Fingerprinting static files..."
+docker-compose -f "$COMPOSE_FILE" exec web flask --app wsgi fingerprint-static
+echo "Precompressing static files..."
+docker-compose -f "$COMPOSE_FILE" exec web flask --app wsgi compress-static
+echo "Prerendering pages..."
+docker-compose -f "$COMPOSE_FILE" exec web flask --app wsgi prerender
+# Workers read the static manifest when they start
+docker-compose -f "$COMPOSE_FILE" restart web
+
 # Run database migrations if requested
 if [[ "$MIGRATE" == true ]]; then
     echo "Running database migrations..."
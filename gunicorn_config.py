@@ -1,6 +1,17 @@
 """Gunicorn configuration file for production deployment."""
 import multiprocessing
 import os
+import shutil
+import tempfile
+
+# Directory where workers share Prometheus metrics. It must exist before the
+# application (and prometheus_client) is imported, which happens before any
+# server hook runs when preload_app is on, so it is prepared here. Start with
+# no metrics left over from a previous run.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR',
+                      os.path.join(tempfile.gettempdir(), 'pythonweb_metrics'))
+shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'])
 
 # Bind to 0.0.0.0:8000 by default, but allow environment variables to override
 bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
@@ -15,6 +26,18 @@ worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
 # Maximum number of simultaneous clients
 worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 1000))
 
+# Database connection pool per worker. DB_MAX_CONNECTIONS is split across
+# the workers (never more per worker than it has greenlets) with no
+# overflow, so the server as a whole stays under the database's limit;
+# requests beyond the pool wait up to DB_POOL_TIMEOUT for a connection.
+# Set before the application (and config.py) is imported.
+os.environ.setdefault('DB_POOL_SIZE', str(max(1, min(
+    worker_connections, int(os.getenv('DB_MAX_CONNECTIONS', 100)) // workers))))
+os.environ.setdefault('DB_MAX_OVERFLOW', '0')
+
+# Lets the app refuse settings that only work in a single process
+os.environ['WORKER_PROCESSES'] = str(workers)
+
 # Maximum number of requests a worker will process before restarting
 max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
 max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 50))
@@ -51,6 +74,33 @@ def post_fork(server, worker):
     """Actions to take after forking a worker."""
     server.log.info(f"Worker spawned (pid: {worker.pid})")
 
+    # With preload_app the engine was created in the master; drop the pooled
+    # connections inherited through fork without closing the master's sockets,
+    # so the worker opens its own.
+    if server.cfg.preload_app:
+        from app import db
+        flask_app = server.app.wsgi()
+        with flask_app.app_context():
+            engines = list(db.engines.values())
+        router = flask_app.extensions.get('replica_router')
+        if router is not None:
+            engines += [replica.engine for replica in router.replicas]
+        for engine in engines:
+            engine.dispose(close=False)
+
+def post_worker_init(worker):
+    """Actions to take once a worker is initialized (and gevent has patched it)."""
+    # Run password hashing in a per-worker process pool so slow key
+    # derivation does not block the gevent hub. The pool's locks and queues
+    # must be created after monkey-patching, so this cannot run in post_fork.
+    from app import hashing
+    hashing.start_executor(int(os.getenv('PASSWORD_HASH_WORKERS', 0)) or None)
+
+    # Let psycopg2 yield to other greenlets while it waits on PostgreSQL
+    if worker_class == 'gevent':
+        from app import green
+        green.patch_psycopg()
+
 def pre_fork(server, worker):
     """Actions to take before forking a worker."""
     pass
@@ -74,3 +124,12 @@ def worker_abort(worker):
 def worker_exit(server, worker):
     """Actions to take when a worker exits."""
     server.log.info(f"Worker exited (pid: {worker.pid})")
+
+    from app import hashing
+    hashing.shutdown_executor()
+
+def child_exit(server, worker):
+    """Actions to take in the master after a worker exits, even if it was killed."""
+    # Drop the exited worker's live gauges (e.g. in-progress requests)
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
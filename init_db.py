@@ -1,20 +1,142 @@
 """
 Database initialization script.
 Run this script to create the initial database and tables.
+
+Pass --users and --posts-per-user to add a synthetic dataset of realistic
+size, e.g. `python init_db.py --users 10000 --posts-per-user 100`.
 """
-import os
+import csv
+import io
+import time
+from datetime import datetime, timedelta
 import click
 from flask.cli import with_appcontext
 from app import create_app, db
+from app.hashing import hash_password
 from app.models import User, Post
+from app.search import deferred_indexing
+
+# Synthetic rows are deterministic: user n is user{n}, and post n was
+# created SYNTHETIC_EPOCH + n seconds, written by user (n - 1) % users + 1
+SYNTHETIC_EPOCH = datetime(2024, 1, 1)
+SYNTHETIC_PASSWORD = 'password'
+BULK_CHUNK_SIZE = 50000
+
+def _chunks(rows, size=BULK_CHUNK_SIZE):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def bulk_insert(table, columns, rows):
+    """
+    Insert many rows using the fastest path the database offers.
+
+    PostgreSQL gets COPY FROM STDIN in CSV format; other databases get one
+    DB-API executemany per chunk, bypassing the ORM.
+
+    Args:
+        table (str): Table name
+        columns (tuple): Column names, in the order of each row's values
+        rows (iterable): Tuples of values
+
+    Returns:
+        int: Number of rows inserted
+    """
+    connection = db.session.connection()
+    dialect = connection.dialect
+    count = 0
+    if dialect.name == 'postgresql':
+        copy = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+        cursor = connection.connection.cursor()
+        try:
+            for chunk in _chunks(rows):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(chunk)
+                buffer.seek(0)
+                cursor.copy_expert(copy, buffer)
+                count += len(chunk)
+        finally:
+            cursor.close()
+    else:
+        placeholder = '?' if dialect.paramstyle == 'qmark' else '%s'
+        insert = (f"INSERT INTO {table} ({', '.join(columns)}) "
+                  f"VALUES ({', '.join([placeholder] * len(columns))})")
+        for chunk in _chunks(rows):
+            connection.exec_driver_sql(insert, chunk)
+            count += len(chunk)
+    return count
+
+def _reset_sequences(*tables):
+    """Move PostgreSQL id sequences past ids inserted explicitly."""
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for table in tables:
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+            f"(SELECT coalesce(max(id), 1) FROM {table}))"))
+
+def generate_data(users, posts_per_user, password=SYNTHETIC_PASSWORD):
+    """
+    Bulk-insert a deterministic synthetic dataset after the existing rows.
+
+    All synthetic users share one password hash, computed once.
+
+    Args:
+        users (int): Number of users to create
+        posts_per_user (int): Number of posts per user
+        password (str): Password of every synthetic user
+
+    Returns:
+        tuple: (users created, posts created)
+    """
+    first_user = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+    first_post = (db.session.query(db.func.max(Post.id)).scalar() or 0) + 1
+    posts = users * posts_per_user
+    password_hash = hash_password(password)
+    # Store datetimes exactly as the ORM would, so they compare correctly
+    # with bound parameters (SQLite keeps them as strings)
+    dialect = db.session.get_bind().dialect
+    to_db = Post.__table__.c.created_at.type.dialect_impl(dialect).bind_processor(dialect) \
+        or (lambda value: value)
+    epoch = to_db(SYNTHETIC_EPOCH)
+
+    def user_rows():
+        for n in range(1, users + 1):
+            yield (first_user + n - 1, f'user{n}', f'user{n}@example.com', password_hash,
+                   False, epoch, epoch, 1)
+
+    def post_rows():
+        for n in range(1, posts + 1):
+            created_at = to_db(SYNTHETIC_EPOCH + timedelta(seconds=n))
+            yield (first_post + n - 1, f'Post {n}',
+                   f'Synthetic post {n} by user{(n - 1) % users + 1}. ' * 4,
+                   created_at, created_at, 1, first_user + (n - 1) % users)
+
+    bulk_insert('users', ('id', 'username', 'email', 'password_hash', 'is_admin',
+                          'created_at', 'updated_at', 'version'), user_rows())
+    with deferred_indexing():
+        bulk_insert('posts', ('id', 'title', 'content', 'created_at', 'updated_at',
+                              'version', 'user_id'), post_rows())
+    _reset_sequences('users', 'posts')
+    db.session.commit()
+    return users, posts
 
 @click.command('init-db')
+@click.option('--users', type=int, default=0,
+              help='Number of synthetic users to generate (default: none)')
+@click.option('--posts-per-user', type=int, default=0,
+              help='Number of posts per synthetic user (default: none)')
 @with_appcontext
-def init_db_command():
+def init_db_command(users, posts_per_user):
     """Clear the existing data and create new tables."""
     db.drop_all()
     db.create_all()
-    
+
     # Create a default admin user
     admin = User(
         username='admin',
@@ -22,38 +144,46 @@ def init_db_command():
         password='adminpassword',
         is_admin=True
     )
-    
+
     # Create a default regular user
     user = User(
         username='user',
         email='user@example.com',
         password='userpassword'
     )
-    
+
     # Create some sample posts
     post1 = Post(
         title='Welcome to Flask Web Template',
         content='This is a sample post to demonstrate the functionality of the application.',
         user_id=1
     )
-    
+
     post2 = Post(
         title='Getting Started with Flask',
         content='Flask is a lightweight WSGI web application framework in Python.',
         user_id=1
     )
-    
+
     # Add to database
     db.session.add(admin)
     db.session.add(user)
     db.session.commit()  # Commit to get user IDs
-    
+
     db.session.add(post1)
     db.session.add(post2)
     db.session.commit()
-    
+
     click.echo('Initialized the database with sample data.')
 
+    if users:
+        start = time.perf_counter()
+        created_users, created_posts = generate_data(users, posts_per_user)
+        elapsed = time.perf_counter() - start
+        click.echo(f'Generated {created_users:,} users and {created_posts:,} posts '
+                   f'in {elapsed:.1f}s ({(created_users + created_posts) / elapsed:,.0f} rows/s). '
+                   f"Their password is '{SYNTHETIC_PASSWORD}'.")
+
 if __name__ == '__main__':
     app = create_app()
     with app.app_context():
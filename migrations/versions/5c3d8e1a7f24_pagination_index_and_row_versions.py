@@ -0,0 +1,38 @@
+"""pagination index and row versions
+
+Revision ID: 5c3d8e1a7f24
+Revises: 3f1a9c2d7b10
+Create Date: 2026-10-18 09:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c3d8e1a7f24'
+down_revision = '3f1a9c2d7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('users', 'posts'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+            batch_op.add_column(sa.Column('version', sa.Integer(), nullable=False,
+                                          server_default='1'))
+        op.execute(f'UPDATE {table} SET updated_at = created_at')
+
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.create_index('ix_posts_created_at_id', ['created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_created_at_id')
+
+    for table in ('posts', 'users'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('version')
+            batch_op.drop_column('updated_at')
@@ -0,0 +1,66 @@
+"""full-text search
+
+Revision ID: 8b2e4d6f0a13
+Revises: 5c3d8e1a7f24
+Create Date: 2026-10-18 09:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2e4d6f0a13'
+down_revision = '5c3d8e1a7f24'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_SEARCH = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5("
+    "title, content, content='posts', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_insert AFTER INSERT ON posts BEGIN "
+    "INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_delete AFTER DELETE ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); "
+    "END",
+    "CREATE TRIGGER IF NOT EXISTS posts_fts_update AFTER UPDATE OF title, content ON posts BEGIN "
+    "INSERT INTO posts_fts(posts_fts, rowid, title, content) "
+    "VALUES ('delete', old.id, old.title, old.content); "
+    "INSERT INTO posts_fts(rowid, title, content) VALUES (new.id, new.title, new.content); "
+    "END",
+    "INSERT INTO posts_fts(posts_fts) VALUES ('rebuild')",
+]
+
+POSTGRESQL_SEARCH = [
+    "ALTER TABLE posts ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    "GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B')) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_posts_search_vector ON posts USING GIN (search_vector)",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        statements = SQLITE_SEARCH
+    elif dialect == 'postgresql':
+        statements = POSTGRESQL_SEARCH
+    else:
+        statements = []
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute('DROP TABLE IF EXISTS posts_fts')
+        for trigger in ('posts_fts_insert', 'posts_fts_delete', 'posts_fts_update'):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+    elif dialect == 'postgresql':
+        op.execute('DROP INDEX IF EXISTS ix_posts_search_vector')
+        op.execute('ALTER TABLE posts DROP COLUMN IF EXISTS search_vector')
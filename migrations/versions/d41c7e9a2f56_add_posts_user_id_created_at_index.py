@@ -0,0 +1,27 @@
+"""add posts (user_id, created_at) index
+
+Revision ID: d41c7e9a2f56
+Revises: 8b2e4d6f0a13
+Create Date: 2026-10-18 09:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd41c7e9a2f56'
+down_revision = '8b2e4d6f0a13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.create_index('ix_posts_user_id_created_at', ['user_id', 'created_at'],
+                              unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('posts', schema=None) as batch_op:
+        batch_op.drop_index('ix_posts_user_id_created_at')
@@ -27,9 +27,9 @@ class APIIntegrationTestCase(IntegrationTestCase):
         data = json.loads(response.data)
 
         # Verify data matches database
-        self.assertEqual(len(data), 2)  # admin and user
-        self.assertEqual(data[0]['username'], 'admin')
-        self.assertEqual(data[1]['username'], 'user')
+        self.assertEqual(len(data['items']), 2)  # admin and user
+        self.assertEqual(data['items'][0]['username'], 'admin')
+        self.assertEqual(data['items'][1]['username'], 'user')
 
     def test_get_user_with_db(self):
         """Test getting a specific user from the API with database integration."""
@@ -133,9 +133,9 @@ class APIIntegrationTestCase(IntegrationTestCase):
         data = json.loads(response.data)
 
         # Verify data matches database
-        self.assertEqual(len(data), 2)  # Two test posts
-        self.assertEqual(data[0]['title'], 'First Test Post')
-        self.assertEqual(data[1]['title'], 'Second Test Post')
+        self.assertEqual(len(data['items']), 2)  # Two test posts
+        self.assertEqual(data['items'][0]['title'], 'First Test Post')
+        self.assertEqual(data['items'][1]['title'], 'Second Test Post')
 
     def test_create_post_with_db(self):
         """Test creating a post through the API with database integration."""
@@ -168,6 +168,106 @@ class APIIntegrationTestCase(IntegrationTestCase):
         self.assertEqual(post.content, 'This post was created through the API.')
         self.assertEqual(post.user_id, 1)
 
+    def test_create_posts_batch_with_db(self):
+        """Test creating posts in bulk through the API with database integration."""
+        headers = get_auth_headers('admin', 'adminpassword')
+        batch = [
+            {'title': 'Batch 1', 'content': 'First batch post.', 'user_id': 1},
+            {'title': 'Batch 2', 'content': 'Second batch post.', 'user_id': 99},
+            {'title': 'Batch 3'},
+            {'title': 'Batch 4', 'content': 'Fourth batch post.', 'user_id': 2}
+        ]
+
+        response = self.client.post(
+            '/api/v1/posts/batch',
+            data=json.dumps(batch),
+            content_type='application/json',
+            headers=headers
+        )
+
+        # Verify per-item results
+        self.assertEqual(response.status_code, 207)
+        data = json.loads(response.data)
+        self.assertEqual(data['created'], 2)
+        self.assertEqual(data['failed'], 2)
+        self.assertEqual([r['status'] for r in data['results']], [201, 400, 400, 201])
+
+        # Verify the valid posts were created in database
+        post = db.session.get(Post, data['results'][3]['id'])
+        self.assertEqual(post.title, 'Batch 4')
+        self.assertEqual(post.user_id, 2)
+        self.assertIsNone(Post.query.filter_by(title='Batch 2').first())
+
+        # NDJSON bodies are accepted as well
+        ndjson = '\n'.join(json.dumps({'title': f'Line {i}', 'content': 'NDJSON post.',
+                                        'user_id': 1}) for i in range(3))
+        response = self.client.post(
+            '/api/v1/posts/batch',
+            data=ndjson,
+            content_type='application/x-ndjson',
+            headers=headers
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(json.loads(response.data)['created'], 3)
+        self.assertEqual(Post.query.filter(Post.title.like('Line %')).count(), 3)
+
+    def test_search_posts_with_db(self):
+        """Test full-text search over posts with database integration."""
+        headers = get_auth_headers('admin', 'adminpassword')
+        post = Post(title='Gardening tips', content='Tomatoes need sun.', user_id=1)
+        db.session.add_all([
+            post,
+            Post(title='Cooking', content='Gardening fresh tomatoes for sauce.', user_id=2)
+        ])
+        db.session.commit()
+
+        # Title matches rank above content matches
+        response = self.client.get('/api/v1/posts/search?q=gardening')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([p['title'] for p in data['items']], ['Gardening tips', 'Cooking'])
+
+        # Every term must match; FTS syntax in the query is treated as text
+        data = json.loads(self.client.get('/api/v1/posts/search?q=sun tomatoes').data)
+        self.assertEqual([p['title'] for p in data['items']], ['Gardening tips'])
+        response = self.client.get('/api/v1/posts/search?q="sun OR (')
+        self.assertEqual(response.status_code, 200)
+
+        # The index follows updates and deletes
+        self.client.put(f'/api/v1/posts/{post.id}', data=json.dumps({'title': 'Orchards'}),
+                        content_type='application/json', headers=headers)
+        data = json.loads(self.client.get('/api/v1/posts/search?q=orchards').data)
+        self.assertEqual(len(data['items']), 1)
+        self.client.delete(f'/api/v1/posts/{post.id}', headers=headers)
+        data = json.loads(self.client.get('/api/v1/posts/search?q=orchards').data)
+        self.assertEqual(data['items'], [])
+
+        # Results are paginated
+        data = json.loads(self.client.get('/api/v1/posts/search?q=test&limit=1').data)
+        self.assertEqual(len(data['items']), 1)
+        self.assertIsNotNone(data['_links']['next'])
+
+        self.assertEqual(self.client.get('/api/v1/posts/search').status_code, 400)
+
+    def test_get_user_posts_with_db(self):
+        """Test paging through one user's posts with database integration."""
+        for i in range(3):
+            db.session.add(Post(title=f'Admin Post {i}', content='Content', user_id=1))
+        db.session.commit()
+
+        response = self.client.get('/api/v1/users/1/posts?limit=2')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        titles = [p['title'] for p in data['items']]
+        while data['_links']['next']:
+            data = json.loads(self.client.get(data['_links']['next']).data)
+            titles.extend(p['title'] for p in data['items'])
+
+        # Only the admin's posts, oldest first
+        self.assertEqual(titles, ['First Test Post', 'Admin Post 0',
+                                  'Admin Post 1', 'Admin Post 2'])
+        self.assertEqual(self.client.get('/api/v1/users/99/posts').status_code, 404)
+
     def test_full_api_workflow(self):
         """Test a complete API workflow with database integration."""
         # 1. Create a new user
@@ -1,7 +1,15 @@
 """Integration tests for database operations."""
+import os
+from unittest import mock
+from flask_migrate import downgrade, upgrade
+from sqlalchemy import inspect
 from tests.integration.base import IntegrationTestCase
 from app.models import User, Post
-from app import db
+from app.search import search_posts
+from app.sqlite import WriteQueue
+from app import create_app, db
+from config import TestingConfig
+from init_db import SYNTHETIC_PASSWORD, generate_data
 # No need for datetime import here
 
 class DatabaseTestCase(IntegrationTestCase):
@@ -151,3 +159,111 @@ class DatabaseTestCase(IntegrationTestCase):
         # Verify the posts were also deleted
         self.assertIsNone(db.session.get(Post, post1_id))
         self.assertIsNone(db.session.get(Post, post2_id))
+
+    def test_migrations(self):
+        """Test that the migrations build the same schema as the models."""
+        db.drop_all()
+        upgrade()
+
+        inspector = inspect(db.engine)
+        indexes = {index['name'] for index in inspector.get_indexes('posts')}
+        self.assertIn('ix_posts_user_id_created_at', indexes)
+        self.assertIn('ix_posts_created_at_id', indexes)
+        columns = {column['name'] for column in inspector.get_columns('users')}
+        self.assertTrue({'updated_at', 'version'} <= columns)
+        self.assertIn('posts_fts', inspector.get_table_names())
+
+        downgrade(revision='base')
+        self.assertEqual(inspect(db.engine).get_table_names(), ['alembic_version'])
+        db.create_all()  # Let tearDown drop the tables as usual
+
+    def test_generate_data(self):
+        """Test the bulk synthetic data generator."""
+        self.assertEqual(generate_data(5, 3), (5, 15))
+        self.assertEqual(User.query.count(), 7)
+        self.assertEqual(Post.query.count(), 17)
+
+        user = User.query.filter_by(username='user5').first()
+        self.assertTrue(user.check_password(SYNTHETIC_PASSWORD))
+        self.assertEqual(user.posts.count(), 3)
+
+        # The search index is rebuilt after the load and kept current again
+        self.assertEqual(len(search_posts('synthetic', limit=100)), 15)
+        post = Post(title='Synthetic title', content='Added later', user_id=user.id)
+        db.session.add(post)
+        db.session.commit()
+        self.assertEqual(post.id, 18)
+        self.assertEqual(len(search_posts('synthetic', limit=100)), 16)
+
+        # Generated timestamps compare correctly with ORM-bound values
+        oldest = Post.query.order_by(Post.created_at).first()
+        self.assertEqual(Post.query.filter(Post.created_at > oldest.created_at).count(), 17)
+
+    def test_engine_pool_options(self):
+        """Test that the configured pool settings reach the engine."""
+        pool = db.engine.pool
+        self.assertEqual(pool.size(), self.app.config['DB_POOL_SIZE'])
+        self.assertEqual(pool._max_overflow, self.app.config['DB_MAX_OVERFLOW'])
+        self.assertEqual(pool._recycle, self.app.config['DB_POOL_RECYCLE'])
+        self.assertTrue(pool._pre_ping)
+
+    def test_in_memory_database(self):
+        """Test that pool sizing is left out for an in-memory SQLite database."""
+        with mock.patch.object(TestingConfig, 'SQLALCHEMY_DATABASE_URI', 'sqlite://'):
+            app = create_app('testing')
+        self.assertNotIn('pool_size', app.config['SQLALCHEMY_ENGINE_OPTIONS'])
+        self.assertEqual(self.app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'],
+                         self.app.config['DB_POOL_SIZE'])
+        with app.app_context():
+            db.create_all()
+            db.session.add(User(username='memory', email='memory@test.com', password='password'))
+            db.session.commit()
+            self.assertEqual(User.query.filter_by(username='memory').count(), 1)
+            db.session.remove()
+
+    def test_sqlite_pragmas(self):
+        """Test that the SQLite profile is applied to new connections."""
+        with db.engine.connect() as connection:
+            pragma = lambda name: connection.exec_driver_sql(f'PRAGMA {name}').scalar()
+            self.assertEqual(pragma('journal_mode'), 'wal')
+            self.assertEqual(pragma('synchronous'), 1)  # NORMAL
+            self.assertEqual(pragma('foreign_keys'), 1)
+            self.assertEqual(pragma('busy_timeout'), self.app.config['SQLITE_BUSY_TIMEOUT'])
+
+    def test_sqlite_write_queue(self):
+        """Test that one connection at a time holds the write slot."""
+        queue = WriteQueue(timeout=0.01)
+        first, second = {}, {}
+        queue.acquire(first)
+        queue.acquire(first)  # Re-entrant for the same connection
+        with self.assertLogs('app.sqlite', 'WARNING'):
+            queue.acquire(second)
+        self.assertNotIn('sqlite_writer', second)
+
+        queue.release(first)
+        queue.release(second)  # Never held; no effect
+        queue.acquire(second)
+        self.assertTrue(second['sqlite_writer'])
+        queue.release(second)
+
+        # Transactions release the slot when they end
+        db.session.add(Post(title='Queued', content='Written', user_id=1))
+        db.session.flush()
+        self.assertTrue(db.session.connection().info.get('sqlite_writer'))
+        db.session.commit()
+        self.assertFalse(db.session.connection().info.get('sqlite_writer'))
+
+    def test_sqlite_write_queue_per_process(self):
+        """Test that the write queue's lock is made on first use in each process."""
+        queue = WriteQueue(timeout=0.01)
+        self.assertIsNone(queue._lock)
+        held = {}
+        queue.acquire(held)
+        lock = queue._lock
+
+        # A forked worker does not inherit the parent's lock, held or not
+        with mock.patch('app.sqlite.os.getpid', return_value=os.getpid() + 1):
+            child = {}
+            queue.acquire(child)
+            self.assertTrue(child['sqlite_writer'])
+            self.assertIsNot(queue._lock, lock)
@@ -0,0 +1,121 @@
+import base64
+import json
+import unittest
+from app import create_app, db
+from app.aio import create_asgi_app
+from app.models import User, Post
+
+def get_auth_headers(username, password):
+    """Generate Basic Auth headers for testing."""
+    credentials = base64.b64encode(f'{username}:{password}'.encode()).decode('utf-8')
+    return {'Authorization': f'Basic {credentials}'}
+
+class TestAsyncAPI(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        """Set up the database with the Flask app and the async app on top of it."""
+        self.app = create_app('testing')
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        user = User(username='testuser', email='test@example.com', password='password')
+        db.session.add(user)
+        db.session.commit()
+        for i in range(3):
+            db.session.add(Post(title=f'Post {i}', content='Content', user_id=user.id))
+        db.session.commit()
+        self.asgi_app = create_asgi_app('testing')
+
+    async def asyncTearDown(self):
+        await self.asgi_app.state.engine.dispose()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    async def request(self, method, path, headers=None, json_body=None):
+        """Call the ASGI app directly; returns (status, headers, decoded JSON body)."""
+        path, _, query = path.partition('?')
+        body = b'' if json_body is None else json.dumps(json_body).encode()
+        headers = dict(headers or {}, **({'Content-Type': 'application/json'} if body else {}))
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+            'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+            'query_string': query.encode(), 'root_path': '',
+            'server': ('testserver', 80), 'client': ('testclient', 50000),
+            'headers': [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        }
+        messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        await self.asgi_app(scope, receive, send)
+        response_headers = {k.decode(): v.decode() for k, v in sent[0]['headers']}
+        content = b''.join(message.get('body', b'') for message in sent[1:])
+        return sent[0]['status'], response_headers, json.loads(content)
+
+    async def test_responses_match_flask_api(self):
+        """Test that read endpoints return the same documents as the Flask API."""
+        token = self.client.post('/api/v1/tokens', headers=get_auth_headers(
+            'testuser', 'password')).get_json()['token']
+        bearer = {'Authorization': f'Bearer {token}'}
+        for path, headers in [('/api/v1/posts?limit=2', {}), ('/api/v1/posts/1', {}),
+                              ('/api/v1/posts/1?fields=title', {}),
+                              ('/api/v1/users/1/posts?limit=2', {}),
+                              ('/api/v1/users', bearer), ('/api/v1/users/1', bearer)]:
+            with self.subTest(path=path):
+                status, _, body = await self.request('GET', path, headers)
+                self.assertEqual(status, 200)
+                self.assertEqual(body, self.client.get(path, headers=headers).get_json())
+
+    async def test_pagination(self):
+        """Test that cursors from the async API page through the collection."""
+        status, _, body = await self.request('GET', '/api/v1/posts?limit=2')
+        self.assertEqual([item['id'] for item in body['items']], [1, 2])
+        status, _, body = await self.request('GET', body['_links']['next'])
+        self.assertEqual([item['id'] for item in body['items']], [3])
+        self.assertIsNone(body['_meta']['next_cursor'])
+
+        status, _, body = await self.request('GET', '/api/v1/posts?after=invalid')
+        self.assertEqual(status, 400)
+
+    async def test_errors(self):
+        """Test that errors are JSON, like the Flask API's."""
+        status, _, body = await self.request('GET', '/api/v1/posts/999')
+        self.assertEqual(status, 404)
+        self.assertEqual(body['message'], 'Post with id 999 not found')
+        status, _, body = await self.request('GET', '/api/v1/users')
+        self.assertEqual(status, 401)
+        status, _, body = await self.request(
+            'GET', '/api/v1/users', {'Authorization': 'Bearer invalid'})
+        self.assertEqual((status, body['message']), (401, 'Invalid token'))
+
+    async def test_token_and_create_post(self):
+        """Test issuing a token and creating a post with it."""
+        status, _, body = await self.request(
+            'POST', '/api/v1/tokens', get_auth_headers('testuser', 'wrong'))
+        self.assertEqual(status, 401)
+        status, _, body = await self.request(
+            'POST', '/api/v1/tokens', get_auth_headers('testuser', 'password'))
+        self.assertEqual(status, 201)
+        bearer = {'Authorization': f"Bearer {body['token']}"}
+
+        status, _, body = await self.request('POST', '/api/v1/posts', bearer, {'title': 'New'})
+        self.assertEqual(status, 400)
+        status, headers, body = await self.request('POST', '/api/v1/posts', bearer, {
+            'title': 'New post', 'content': 'Written asynchronously', 'user_id': 1})
+        self.assertEqual(status, 201)
+        self.assertEqual(headers['location'], '/api/v1/posts/4')
+        stored = self.client.get('/api/v1/posts/4').get_json()
+        self.assertEqual((body['title'], body['created_at']), (stored['title'], stored['created_at']))
+
+if __name__ == '__main__':
+    unittest.main()
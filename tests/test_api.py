@@ -1,8 +1,11 @@
 import unittest
 import json
 import base64
-from app import create_app, db
+from unittest import mock
+from app import cache, create_app, db
+from app import json_provider
 from app.models import User, Post
+from config import TestingConfig
 
 def get_auth_headers(username, password):
     """Generate Basic Auth headers for testing."""
@@ -54,9 +57,27 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         
         data = json.loads(response.data)
-        self.assertTrue(isinstance(data, list))
-        self.assertEqual(len(data), 1)
-        self.assertEqual(data[0]['username'], 'testuser')
+        self.assertTrue(isinstance(data['items'], list))
+        self.assertEqual(len(data['items']), 1)
+        self.assertEqual(data['items'][0]['username'], 'testuser')
+
+    def test_stream_users(self):
+        """Test streaming the full users collection as a JSON array."""
+        for i in range(3):
+            db.session.add(User(username=f'user{i}', email=f'user{i}@example.com',
+                                password='password'))
+        db.session.commit()
+        self.app.config['API_STREAM_BATCH_SIZE'] = 2
+
+        headers = get_auth_headers('testuser', 'password')
+        response = self.client.get('/api/v1/users?stream=1', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+
+        data = json.loads(response.get_data())
+        self.assertEqual([u['username'] for u in data],
+                         ['testuser', 'user0', 'user1', 'user2'])
+        self.assertEqual(data[0]['_links']['self'], '/api/v1/users/1')
     
     def test_get_user(self):
         """Test getting a specific user."""
@@ -97,9 +118,33 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         
         data = json.loads(response.data)
-        self.assertTrue(isinstance(data, list))
-        self.assertEqual(len(data), 1)
-        self.assertEqual(data[0]['title'], 'Test Post')
+        self.assertTrue(isinstance(data['items'], list))
+        self.assertEqual(len(data['items']), 1)
+        self.assertEqual(data['items'][0]['title'], 'Test Post')
+        self.assertIsNone(data['_links']['next'])
+
+    def test_get_posts_pagination(self):
+        """Test walking the posts collection with a cursor."""
+        for i in range(4):
+            db.session.add(Post(title=f'Post {i}', content='Content', user_id=1))
+        db.session.commit()
+
+        response = self.client.get('/api/v1/posts?limit=2')
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.data)
+        self.assertEqual([p['title'] for p in data['items']], ['Test Post', 'Post 0'])
+        self.assertIsNotNone(data['_meta']['next_cursor'])
+
+        titles = [p['title'] for p in data['items']]
+        while data['_links']['next']:
+            response = self.client.get(data['_links']['next'])
+            self.assertEqual(response.status_code, 200)
+            data = json.loads(response.data)
+            titles.extend(p['title'] for p in data['items'])
+        self.assertEqual(titles, ['Test Post', 'Post 0', 'Post 1', 'Post 2', 'Post 3'])
+
+        response = self.client.get('/api/v1/posts?after=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
     
     def test_get_post(self):
         """Test getting a specific post."""
@@ -136,3 +181,128 @@ class TestAPI(unittest.TestCase):
         post = Post.query.filter_by(title='New Post').first()
         self.assertIsNotNone(post)
         self.assertEqual(post.content, 'This is a new post')
+
+    def test_token_auth(self):
+        """Test issuing a bearer token and using it on a protected endpoint."""
+        response = self.client.post('/api/v1/tokens')
+        self.assertEqual(response.status_code, 401)
+
+        headers = get_auth_headers('testuser', 'password')
+        response = self.client.post('/api/v1/tokens', headers=headers)
+        self.assertEqual(response.status_code, 201)
+        token = json.loads(response.data)['token']
+
+        response = self.client.get('/api/v1/users/1',
+                                   headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['username'], 'testuser')
+
+        response = self.client.get('/api/v1/users/1',
+                                   headers={'Authorization': f'Bearer {token}x'})
+        self.assertEqual(response.status_code, 401)
+
+        self.app.config['API_TOKEN_EXPIRATION'] = -1
+        response = self.client.get('/api/v1/users/1',
+                                   headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 401)
+
+    def test_post_response_cache(self):
+        """Test that post reads are cached and invalidated by API writes."""
+        cache.init_app(self.app, config={'CACHE_TYPE': 'SimpleCache'})
+        headers = get_auth_headers('testuser', 'password')
+
+        self.assertEqual(json.loads(self.client.get('/api/v1/posts/1').data)['title'], 'Test Post')
+        self.assertEqual(len(json.loads(self.client.get('/api/v1/posts').data)['items']), 1)
+
+        # Writes that bypass the API are not seen until the entries are invalidated
+        db.session.get(Post, 1).title = 'Changed Directly'
+        db.session.add(Post(title='Direct Post', content='Content', user_id=1))
+        db.session.commit()
+        self.assertEqual(json.loads(self.client.get('/api/v1/posts/1').data)['title'], 'Test Post')
+        self.assertEqual(len(json.loads(self.client.get('/api/v1/posts').data)['items']), 1)
+
+        response = self.client.put('/api/v1/posts/1',
+                                   data=json.dumps({'content': 'Updated'}),
+                                   content_type='application/json',
+                                   headers=headers)
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(self.client.get('/api/v1/posts/1').data)
+        self.assertEqual(data['title'], 'Changed Directly')
+        self.assertEqual(data['content'], 'Updated')
+        self.assertEqual(len(json.loads(self.client.get('/api/v1/posts').data)['items']), 2)
+
+        response = self.client.delete('/api/v1/posts/1', headers=headers)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get('/api/v1/posts/1').status_code, 404)
+        self.assertEqual(len(json.loads(self.client.get('/api/v1/posts').data)['items']), 1)
+
+    def test_per_process_cache_refused(self):
+        """Test that a SimpleCache response cache is refused under several workers."""
+        with mock.patch.multiple(TestingConfig, CACHE_TYPE='SimpleCache', WORKER_PROCESSES=4):
+            with self.assertRaises(RuntimeError):
+                create_app('testing')
+        with mock.patch.multiple(TestingConfig, CACHE_TYPE='RedisCache', WORKER_PROCESSES=4):
+            create_app('testing')
+
+    def test_conditional_requests(self):
+        """Test ETag validation and If-Match preconditions on posts."""
+        headers = get_auth_headers('testuser', 'password')
+        response = self.client.get('/api/v1/posts/1')
+        self.assertEqual(response.status_code, 200)
+        etag = response.headers['ETag']
+        self.assertIsNotNone(response.last_modified)
+
+        response = self.client.get('/api/v1/posts/1', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+
+        response = self.client.put('/api/v1/posts/1',
+                                   data=json.dumps({'title': 'Stale'}),
+                                   content_type='application/json',
+                                   headers={**headers, 'If-Match': '"posts-1-v0"'})
+        self.assertEqual(response.status_code, 412)
+
+        response = self.client.put('/api/v1/posts/1',
+                                   data=json.dumps({'title': 'Fresh'}),
+                                   content_type='application/json',
+                                   headers={**headers, 'If-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+        response = self.client.get('/api/v1/posts/1', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.data)['title'], 'Fresh')
+
+        response = self.client.get('/api/v1/users/1', headers=headers)
+        response = self.client.get('/api/v1/users/1',
+                                   headers={**headers, 'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_field_selection(self):
+        """Test limiting representations with ?fields=."""
+        response = self.client.get('/api/v1/posts?fields=title,bogus')
+        self.assertEqual(response.status_code, 200)
+        item = json.loads(response.data)['items'][0]
+        self.assertEqual(set(item), {'id', 'title', '_links'})
+        self.assertEqual(item['_links'], {'self': '/api/v1/posts/1', 'author': '/api/v1/users/1'})
+
+        response = self.client.get('/api/v1/posts/1?fields=content')
+        data = json.loads(response.data)
+        self.assertEqual(set(data), {'id', 'content', '_links'})
+        self.assertEqual(data['_links']['posts'], '/api/v1/posts')
+
+    @unittest.skipIf(json_provider.orjson is None, 'orjson is not installed')
+    def test_jsonify_uses_orjson(self):
+        """Test that API responses are encoded by orjson, compact or indented."""
+        self.assertIsInstance(self.app.json, json_provider.OrjsonProvider)
+        with mock.patch.object(json_provider.orjson, 'dumps',
+                               wraps=json_provider.orjson.dumps) as dumps:
+            response = self.client.get('/api/v1/posts/1')
+            self.assertTrue(dumps.called)
+            self.assertNotIn(b': ', response.data)
+
+            dumps.reset_mock()
+            self.app.debug = True
+            response = self.client.get('/api/v1/posts/1?fields=title')
+            self.assertTrue(dumps.called)
+            self.assertIn(b'\n  "id": 1', response.data)
@@ -0,0 +1,70 @@
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app
+from app.assets import HASHED_NAME, IMMUTABLE_MAX_AGE, Manifest, fingerprint_static
+
+class TestAssets(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment with a copy of the static folder."""
+        self.app = create_app('testing')
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.static = os.path.join(directory, 'static')
+        # Leave out hashed copies and precompressed files from earlier deploys
+        shutil.copytree(self.app.static_folder, self.static, ignore=lambda root, names: [
+            name for name in names if name.endswith(('.gz', '.br')) or HASHED_NAME.search(name)])
+        self.app.static_folder = self.static
+        self.app.config['STATIC_MANIFEST'] = os.path.join(directory, 'manifest.json')
+        self.client = self.app.test_client()
+
+    def fingerprint(self):
+        """Fingerprint the static folder and load the manifest as at startup."""
+        result = self.app.test_cli_runner().invoke(args=['fingerprint-static'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        manifest = Manifest.load(self.app.config['STATIC_MANIFEST'])
+        self.app.extensions['static_manifest'] = manifest
+        return manifest
+
+    def test_fingerprint_static(self):
+        """Test that hashed copies follow content changes and earlier ones are kept."""
+        manifest, written = fingerprint_static(self.static)
+        hashed = manifest.files['css/style.css']
+        self.assertRegex(hashed, r'^css/style\.[0-9a-f]{12}\.css$')
+        self.assertIn(os.path.join(self.static, *hashed.split('/')), written)
+        again, written = fingerprint_static(self.static)
+        self.assertEqual(again.files, manifest.files)
+        self.assertEqual(written, [])
+
+        with open(os.path.join(self.static, 'css', 'style.css'), 'a') as f:
+            f.write('\nbody { color: red; }\n')
+        updated, written = fingerprint_static(self.static)
+        self.assertNotEqual(updated.files['css/style.css'], hashed)
+        self.assertEqual(updated.files['js/script.js'], manifest.files['js/script.js'])
+        self.assertEqual(len(written), 1)
+        self.assertTrue(os.path.exists(os.path.join(self.static, *hashed.split('/'))))
+
+    def test_pages_link_hashed_files(self):
+        """Test that url_for('static') links to hashed copies once fingerprinted."""
+        self.assertIn(b'/static/css/style.css', self.client.get('/about').data)
+        manifest = self.fingerprint()
+        page = self.client.get('/about').data.decode()
+        self.assertIn(f'/static/{manifest.files["css/style.css"]}', page)
+        self.assertIn(f'/static/{manifest.files["js/script.js"]}', page)
+
+    def test_immutable_caching(self):
+        """Test that only hashed copies are served as immutable."""
+        manifest = self.fingerprint()
+        response = self.client.get(f'/static/{manifest.files["css/style.css"]}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.cache_control.immutable)
+        self.assertEqual(response.cache_control.max_age, IMMUTABLE_MAX_AGE)
+        response.close()
+
+        response = self.client.get('/static/css/style.css')
+        self.assertFalse(response.cache_control.immutable)
+        response.close()
+
+if __name__ == '__main__':
+    unittest.main()
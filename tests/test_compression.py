@@ -0,0 +1,119 @@
+import base64
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from app import create_app, db
+from app.compression import brotli, compress_static
+from app.models import User, Post
+
+def get_auth_headers(username, password):
+    """Generate Basic Auth headers for testing."""
+    credentials = base64.b64encode(f'{username}:{password}'.encode()).decode('utf-8')
+    return {'Authorization': f'Basic {credentials}'}
+
+class TestCompression(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app('testing')
+        self.app.config['COMPRESSION_MIN_SIZE'] = 200
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        user = User(username='testuser', email='test@example.com', password='password')
+        db.session.add(user)
+        db.session.commit()
+        for i in range(10):
+            db.session.add(Post(title=f'Post {i}', content='Compressible content ' * 5,
+                                user_id=user.id))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_gzip(self):
+        """Test that large JSON responses are gzipped for clients accepting it."""
+        plain = self.client.get('/api/v1/posts')
+        self.assertNotIn('Content-Encoding', plain.headers)
+        self.assertIn('Accept-Encoding', plain.headers['Vary'])
+
+        response = self.client.get('/api/v1/posts', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(int(response.headers['Content-Length']), len(response.data))
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+
+    def test_compressed_etag_is_weak(self):
+        """Test that compressed bodies get a weak ETag that still validates."""
+        accept = {'Accept-Encoding': 'gzip'}
+        strong = self.client.get('/api/v1/posts/1').headers['ETag']
+        response = self.client.get('/api/v1/posts/1', headers=accept)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        etag = response.headers['ETag']
+        self.assertEqual(etag, f'W/{strong}')
+
+        for tag in (etag, strong):
+            response = self.client.get('/api/v1/posts/1', headers={**accept, 'If-None-Match': tag})
+            self.assertEqual(response.status_code, 304)
+        response = self.client.put('/api/v1/posts/1', json={'title': 'Updated'},
+                                   headers={**get_auth_headers('testuser', 'password'),
+                                            'If-Match': etag})
+        self.assertEqual(response.status_code, 200)
+
+    @unittest.skipIf(brotli is None, 'brotli is not installed')
+    def test_brotli_preferred(self):
+        """Test that brotli wins unless the client prefers gzip."""
+        plain = self.client.get('/api/v1/posts')
+        response = self.client.get('/api/v1/posts', headers={'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(brotli.decompress(response.data), plain.data)
+
+        response = self.client.get('/api/v1/posts',
+                                   headers={'Accept-Encoding': 'gzip, br;q=0.5'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+
+    def test_small_and_refused(self):
+        """Test that small responses and refused codings are sent uncompressed."""
+        response = self.client.get('/api/v1/posts/1?fields=title',
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertNotIn('Content-Encoding', response.headers)
+        response = self.client.get('/api/v1/posts',
+                                   headers={'Accept-Encoding': 'gzip;q=0, br;q=0'})
+        self.assertNotIn('Content-Encoding', response.headers)
+
+    def test_streamed_response(self):
+        """Test that streamed responses are compressed chunk by chunk."""
+        self.app.config['API_STREAM_BATCH_SIZE'] = 1
+        headers = get_auth_headers('testuser', 'password')
+        plain = self.client.get('/api/v1/users?stream=1', headers=headers)
+        response = self.client.get('/api/v1/users?stream=1',
+                                   headers={**headers, 'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response.headers)
+        self.assertEqual(gzip.decompress(response.data), plain.data)
+
+    def test_compress_static(self):
+        """Test that compress-static writes smaller siblings once."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, 'style.css'), 'w') as f:
+            f.write('body { margin: 0; }\n' * 100)
+        with open(os.path.join(directory, 'tiny.css'), 'w') as f:
+            f.write('a {}')
+        with open(os.path.join(directory, 'image.png'), 'wb') as f:
+            f.write(b'\x89PNG' * 100)
+
+        written = compress_static(directory, self.app.config['COMPRESSION_MIMETYPES'], 200)
+        self.assertIn(os.path.join(directory, 'style.css.gz'), written)
+        self.assertEqual(len(written), 2 if brotli is not None else 1)
+        with gzip.open(os.path.join(directory, 'style.css.gz'), 'rt') as f:
+            self.assertEqual(f.read(), 'body { margin: 0; }\n' * 100)
+        self.assertEqual(compress_static(directory, self.app.config['COMPRESSION_MIMETYPES'], 200), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+import base64
+import threading
+import time
+import unittest
+from cachelib import SimpleCache
+from prometheus_client import REGISTRY
+from app import cache, create_app, db, entity_cache
+from app.entity_cache import INVALIDATED, EntityCache
+from app.models import Post, User
+
+def get_auth_headers(username, password):
+    """Generate Basic Auth headers for testing."""
+    credentials = base64.b64encode(f'{username}:{password}'.encode()).decode('utf-8')
+    return {'Authorization': f'Basic {credentials}'}
+
+def lookups(entity, result):
+    """Return the entity cache lookup counter for an entity and result."""
+    return REGISTRY.get_sample_value('entity_cache_lookups_total',
+                                     {'entity': entity, 'result': result}) or 0
+
+class SlowSession:
+    """Stand-in session whose loads take a while, counting how often it is asked."""
+
+    def __init__(self, delay=0.2, error=None):
+        self.new = self.dirty = self.deleted = ()
+        self.info = {}
+        self.delay = delay
+        self.error = error
+        self.loads = 0
+
+    def get(self, model, id):
+        self.loads += 1
+        time.sleep(self.delay)
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        return model(id=id, title='Slow Post', content='Loaded once', user_id=1)
+
+def load_concurrently(entities, session, count):
+    """Look a post up from count threads at once and return what they got or raised."""
+    results = [None] * count
+
+    def load(i):
+        try:
+            results[i] = entities.get(session, Post, 1)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=load, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+class TestCoalescing(unittest.TestCase):
+    def test_concurrent_misses_load_once(self):
+        """Test that concurrent misses for one entity share a single load."""
+        entities = EntityCache((User, Post), 10, 30, coalesce_timeout=5)
+        session = SlowSession()
+        coalesced = lookups('posts', 'coalesced')
+        results = load_concurrently(entities, session, 10)
+        self.assertEqual(session.loads, 1)
+        self.assertEqual([post.title for post in results], ['Slow Post'] * 10)
+        self.assertEqual(lookups('posts', 'coalesced') - coalesced, 9)
+
+    def test_failed_load_not_shared(self):
+        """Test that requests waiting on a load that fails load for themselves."""
+        entities = EntityCache((User, Post), 10, 30, coalesce_timeout=5)
+        session = SlowSession(error=RuntimeError('connection lost'))
+        results = load_concurrently(entities, session, 3)
+        errors = [result for result in results if isinstance(result, RuntimeError)]
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(session.loads, 3)
+
+    def test_shared_lock(self):
+        """Test that a miss waits for another process holding the load lock."""
+        shared = SimpleCache()
+        entities = EntityCache((User, Post), 10, 30, shared, 60, coalesce_timeout=5,
+                               shared_lock=True)
+        key = EntityCache.key(Post, 1)
+        # Another process is loading the post and stores it shortly
+        self.assertTrue(shared.add(f'lock/{key}', 1))
+        fields = {'id': 1, 'title': 'From Elsewhere', 'content': '', 'user_id': 1}
+        threading.Timer(0.1, shared.set, (key, fields)).start()
+        session = SlowSession()
+        self.assertEqual(entities.get(session, Post, 1).title, 'From Elsewhere')
+        self.assertEqual(session.loads, 0)
+
+    def test_uncoalesced(self):
+        """Test that each miss loads on its own when coalescing is off."""
+        entities = EntityCache((User, Post), 10, 30)
+        session = SlowSession(delay=0.05)
+        load_concurrently(entities, session, 3)
+        self.assertEqual(session.loads, 3)
+
+class TestEntityCache(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment; requests run in their own app contexts."""
+        self.app = create_app('testing')
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(User(username='testuser', email='test@example.com', password='password'))
+            db.session.commit()
+            db.session.add(Post(title='Test Post', content='This is a test post', user_id=1))
+            db.session.commit()
+        self.client = self.app.test_client()
+        self.headers = get_auth_headers('testuser', 'password')
+
+    def tearDown(self):
+        """Clean up after tests."""
+        with self.app.app_context():
+            db.drop_all()
+
+    def query_count(self, response):
+        """Return the number of queries reported in the Server-Timing header."""
+        return int(response.headers['Server-Timing'].split('desc="')[1].split()[0])
+
+    def test_hit_skips_database(self):
+        """Test that a cached post is served without a query."""
+        misses, hits = lookups('posts', 'miss'), lookups('posts', 'l1_hit')
+        self.assertEqual(self.query_count(self.client.get('/api/v1/posts/1')), 1)
+        response = self.client.get('/api/v1/posts/1')
+        self.assertEqual(response.get_json()['title'], 'Test Post')
+        self.assertEqual(self.query_count(response), 0)
+        self.assertEqual(lookups('posts', 'miss') - misses, 1)
+        self.assertEqual(lookups('posts', 'l1_hit') - hits, 1)
+
+    def test_update_invalidates(self):
+        """Test that a committed update is visible on the next read."""
+        self.client.get('/api/v1/posts/1')
+        response = self.client.put('/api/v1/posts/1', json={'title': 'Updated'},
+                                   headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/api/v1/posts/1').get_json()['title'], 'Updated')
+
+    def test_cascaded_delete_invalidates(self):
+        """Test that posts deleted along with their author are evicted."""
+        self.client.get('/api/v1/posts/1')
+        self.client.get('/api/v1/users/1', headers=self.headers)
+        response = self.client.delete('/api/v1/users/1', headers=self.headers)
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(self.client.get('/api/v1/posts/1').status_code, 404)
+
+    def test_shared_cache(self):
+        """Test that entities missing in the process are read from the shared cache."""
+        self.app.config['CACHE_TYPE'] = 'SimpleCache'
+        cache.init_app(self.app)
+        entities = self.app.extensions['entity_cache'] = EntityCache(
+            (User, Post), 10, 30, cache, 60)
+        # ?fields= bypasses the response cache
+        self.client.get('/api/v1/posts/1?fields=title')
+
+        entities.clear()
+        hits = lookups('posts', 'l2_hit')
+        response = self.client.get('/api/v1/posts/1?fields=title')
+        self.assertEqual(response.get_json()['title'], 'Test Post')
+        self.assertEqual(self.query_count(response), 0)
+        self.assertEqual(lookups('posts', 'l2_hit') - hits, 1)
+
+        with self.app.app_context():
+            db.session.get(Post, 1).title = 'Updated'
+            db.session.commit()
+            self.assertEqual(cache.get(EntityCache.key(Post, 1)), INVALIDATED)
+        response = self.client.get('/api/v1/posts/1?fields=title')
+        self.assertEqual(response.get_json()['title'], 'Updated')
+
+    def test_invalidated_during_load(self):
+        """Test that a row read before a commit is not cached after the commit evicts it."""
+        shared = SimpleCache()
+        entities = EntityCache((User, Post), 10, 30, shared, 60)
+        session = SlowSession(delay=0)
+        load = session.get
+
+        def get_then_commit(model, id):
+            obj = load(model, id)
+            entities.invalidate((model, id))
+            return obj
+
+        session.get = get_then_commit
+        entities.get(session, Post, 1)
+        self.assertEqual(shared.get(EntityCache.key(Post, 1)), INVALIDATED)
+        self.assertEqual(entities.local.get(EntityCache.key(Post, 1)), INVALIDATED)
+        entities.get(session, Post, 1)
+        self.assertEqual(session.loads, 2)
+
+    def test_uncommitted_changes_not_cached(self):
+        """Test that rows read inside a transaction with pending writes are not cached."""
+        with self.app.app_context():
+            db.session.get(Post, 1).title = 'Uncommitted'
+            db.session.flush()
+            self.assertEqual(entity_cache.get(Post, 1).title, 'Uncommitted')
+            db.session.rollback()
+        self.assertEqual(self.client.get('/api/v1/posts/1').get_json()['title'], 'Test Post')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,156 @@
+import base64
+import unittest
+from app import cache, create_app, db
+from app.entity_cache import INVALIDATED
+from app.identity import IdentityCache, load_identity
+from app.models import User
+
+def get_auth_headers(username, password):
+    """Generate Basic Auth headers for testing."""
+    credentials = base64.b64encode(f'{username}:{password}'.encode()).decode('utf-8')
+    return {'Authorization': f'Basic {credentials}'}
+
+class StubSession:
+    """Stand-in session returning a fixed user, optionally as if read from a replica."""
+
+    def __init__(self, user, replica=None):
+        self.new = self.dirty = self.deleted = ()
+        self.info = {'replica': replica}
+        self.user = user
+        self.loads = 0
+
+    def get(self, model, id):
+        self.loads += 1
+        return self.user
+
+class TestIdentityCache(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment; requests run in their own app contexts."""
+        self.app = create_app('testing')
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(User(username='admin', email='admin@example.com',
+                                password='adminpassword', is_admin=True))
+            db.session.add(User(username='user', email='user@example.com',
+                                password='userpassword'))
+            db.session.commit()
+        self.client = self.app.test_client()
+        self.identities = self.app.extensions['identity_cache']
+        self.client.post('/auth/login', data={'email': 'user@example.com',
+                                              'password': 'userpassword'})
+
+    def tearDown(self):
+        """Clean up after tests."""
+        with self.app.app_context():
+            db.drop_all()
+
+    def query_count(self, response):
+        """Return the number of queries reported in the Server-Timing header."""
+        return int(response.headers['Server-Timing'].split('desc="')[1].split()[0])
+
+    def test_dashboard_skips_database(self):
+        """Test that repeated page views do not query the users table."""
+        self.assertEqual(self.query_count(self.client.get('/dashboard')), 1)
+        response = self.client.get('/dashboard')
+        self.assertIn(b'user@example.com', response.data)
+        self.assertEqual(self.query_count(response), 0)
+
+    def test_update_invalidates(self):
+        """Test that updating a user is visible on the next page view."""
+        self.client.get('/dashboard')
+        response = self.client.put('/api/v1/users/2', json={'username': 'renamed'},
+                                   headers=get_auth_headers('admin', 'adminpassword'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Welcome, renamed', self.client.get('/dashboard').data)
+
+    def test_delete_invalidates(self):
+        """Test that a deleted user is logged out."""
+        self.client.get('/dashboard')
+        response = self.client.delete('/api/v1/users/2',
+                                      headers=get_auth_headers('admin', 'adminpassword'))
+        self.assertEqual(response.status_code, 204)
+        response = self.client.get('/dashboard')
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/auth/login', response.headers['Location'])
+
+    def test_password_change_invalidates(self):
+        """Test that changing a password drops the cached identity."""
+        key = IdentityCache.key(User, 2)
+        self.client.get('/dashboard')
+        self.assertEqual(self.identities.local.get(key)['username'], 'user')
+        response = self.client.put('/api/v1/users/2', json={'password': 'changed'},
+                                   headers=get_auth_headers('user', 'userpassword'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.identities.local.get(key), INVALIDATED)
+
+    def test_shared_cache(self):
+        """Test that identities missing in the process are read from the shared cache."""
+        self.app.config['CACHE_TYPE'] = 'SimpleCache'
+        cache.init_app(self.app)
+        identities = self.app.extensions['identity_cache'] = IdentityCache(10, 30, cache, 60)
+        self.client.get('/dashboard')
+
+        identities.clear()
+        response = self.client.get('/dashboard')
+        self.assertIn(b'Welcome, user', response.data)
+        self.assertEqual(self.query_count(response), 0)
+
+        with self.app.app_context():
+            identities.invalidate((User, 2))
+            self.assertEqual(cache.get(IdentityCache.key(User, 2)), INVALIDATED)
+
+    def test_lru_and_ttl(self):
+        """Test eviction of the least recently used and of expired identities."""
+        identities = IdentityCache(1, 30)
+        with self.app.app_context():
+            first, second = User.query.order_by(User.id).all()
+        identities.get(StubSession(first), User, first.id)
+        identities.get(StubSession(second), User, second.id)
+        self.assertIsNone(identities.local.get(IdentityCache.key(User, first.id)))
+        self.assertEqual(identities.local.get(IdentityCache.key(User, second.id))['username'],
+                         'user')
+
+        identities.local.ttl = -1
+        identities.get(StubSession(first), User, first.id)
+        self.assertIsNone(identities.local.get(IdentityCache.key(User, first.id)))
+
+    def test_replica_reads_not_cached(self):
+        """Test that a user read from a replica, which may lag, is not cached."""
+        with self.app.app_context():
+            user = db.session.get(User, 2)
+        session = StubSession(user, replica=object())
+        self.assertEqual(self.identities.get(session, User, 2).username, 'user')
+        self.assertIsNone(self.identities.local.get(IdentityCache.key(User, 2)))
+        self.identities.get(session, User, 2)
+        self.assertEqual(session.loads, 2)
+
+    def test_invalidated_during_load(self):
+        """Test that a user read before a commit is not cached after the commit evicts it."""
+        with self.app.app_context():
+            user = db.session.get(User, 2)
+        session = StubSession(user)
+        load = session.get
+
+        def get_then_commit(model, id):
+            found = load(model, id)
+            self.identities.invalidate((model, id))
+            return found
+
+        session.get = get_then_commit
+        self.identities.get(session, User, 2)
+        self.assertEqual(self.identities.local.get(IdentityCache.key(User, 2)), INVALIDATED)
+        self.identities.get(session, User, 2)
+        self.assertEqual(session.loads, 2)
+
+    def test_identity_snapshot(self):
+        """Test that load_identity hands out identities with only the cached fields."""
+        with self.app.app_context():
+            identity = load_identity(2)
+            self.assertEqual(identity.username, 'user')
+            self.assertFalse(hasattr(identity, 'password_hash'))
+            self.assertNotIn('password_hash', self.identities.local.get(IdentityCache.key(User, 2)))
+            self.assertIsNone(load_identity(99))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import unittest
+from unittest import mock
+from app import create_app, db
+from app.instrumentation import _slow_queries, explain, fingerprint, parameter_shapes
+from app.models import User, Post
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app('testing')
+        self.app.config['SQL_N_PLUS_ONE_THRESHOLD'] = 3
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        db.create_all()
+        self.client = self.app.test_client()
+
+        user = User(username='testuser', email='test@example.com', password='password')
+        db.session.add(user)
+        db.session.commit()
+        db.session.add(Post(title='Test Post', content='This is a test post', user_id=user.id))
+        db.session.commit()
+
+    def tearDown(self):
+        """Clean up after tests."""
+        db.session.remove()
+        db.drop_all()
+        self.app_context.pop()
+
+    def test_fingerprint(self):
+        """Test that statements differing only in values share a fingerprint."""
+        self.assertEqual(
+            fingerprint("SELECT * FROM posts WHERE id IN (?, ?, ?) AND title = 'a''b'"),
+            fingerprint("SELECT *\n  FROM posts WHERE id IN (?) AND title = 'c'"))
+        self.assertEqual(fingerprint('SELECT * FROM posts LIMIT 20'),
+                         'SELECT * FROM posts LIMIT ?')
+
+    def test_server_timing_header(self):
+        """Test that responses report query counts and timings."""
+        response = self.client.get('/api/v1/posts/1')
+        self.assertEqual(response.status_code, 200)
+        timing = response.headers['Server-Timing']
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="1 queries", app;dur=[\d.]+$')
+
+    def test_n_plus_one_warning(self):
+        """Test that a SELECT repeated within one request is flagged."""
+        @self.app.route('/n-plus-one')
+        def n_plus_one():
+            for post in Post.query.all():
+                for _ in range(3):
+                    db.session.expire(post)
+                    post.title
+            return 'ok'
+
+        with self.assertLogs('app.instrumentation', level='WARNING') as logs:
+            self.client.get('/n-plus-one')
+        self.assertIn('Possible N+1 query in n_plus_one', logs.output[0])
+
+    def test_slow_query_log(self):
+        """Test that slow queries are logged once per interval with their plan."""
+        self.app.config['SLOW_QUERY_THRESHOLD'] = 1e-9
+        _slow_queries.clear()
+
+        with self.assertLogs('app.instrumentation', level='WARNING') as logs:
+            self.client.get('/api/v1/posts/1')
+            self.client.get('/api/v1/posts/1')
+        slow = [r for r in logs.records if r.getMessage().startswith('Slow query')]
+        self.assertEqual(len(slow), 1)
+        self.assertEqual(slow[0].route, 'api.get_post')
+        self.assertEqual(slow[0].parameter_shapes, ['int'])
+        self.assertIn('USING INTEGER PRIMARY KEY', ' '.join(slow[0].plan))
+
+    def test_failed_explain_keeps_transaction(self):
+        """Test that a failed PostgreSQL EXPLAIN is rolled back to a savepoint and logged."""
+        executed = []
+
+        def execute(sql, parameters=None):
+            executed.append(sql)
+            if sql.startswith('EXPLAIN'):
+                raise RuntimeError('could not plan')
+
+        cursor = mock.Mock()
+        cursor.connection.autocommit = False
+        cursor.connection.cursor.return_value.execute.side_effect = execute
+        conn = mock.Mock()
+        conn.dialect.name = 'postgresql'
+        with self.assertLogs('app.instrumentation', level='WARNING') as logs:
+            self.assertIsNone(explain(conn, cursor, 'SELECT 1', {}))
+        self.assertIn('could not plan', logs.output[0])
+        self.assertEqual(executed, ['SAVEPOINT explain_plan', 'EXPLAIN SELECT 1',
+                                    'ROLLBACK TO SAVEPOINT explain_plan',
+                                    'RELEASE SAVEPOINT explain_plan'])
+
+    def test_parameter_shapes(self):
+        """Test that parameter values are reduced to their types."""
+        self.assertEqual(parameter_shapes({'id': 1, 'title': 'x'}), {'id': 'int', 'title': 'str'})
+        self.assertEqual(parameter_shapes([(1, 'x'), (2, 'y')], executemany=True),
+                         {'rows': 2, 'row': ['int', 'str']})
+
+    def test_metrics_endpoint(self):
+        """Test that request metrics are exposed in the Prometheus format."""
+        self.client.get('/api/v1/posts')
+        self.client.get('/no-such-page')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        text = response.get_data(as_text=True)
+        self.assertIn('http_request_duration_seconds_bucket{endpoint="api.get_posts"', text)
+        self.assertIn('http_requests_total{endpoint="unmatched",method="GET",status="404"}', text)
+        self.assertIn('http_requests_in_progress', text)
+        self.assertIn('db_pool_connections_checked_out', text)
+
+    def test_metrics_token(self):
+        """Test that /metrics requires the bearer token when one is configured."""
+        self.app.config['METRICS_TOKEN'] = 'scrape-secret'
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(response.status_code, 401)
+        response = self.client.get('/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+        self.assertEqual(response.status_code, 200)
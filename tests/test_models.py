@@ -1,5 +1,5 @@
 import unittest
-from app import create_app, db
+from app import create_app, db, hashing
 from app.models import User, Post
 
 class TestModels(unittest.TestCase):
@@ -55,3 +55,15 @@ class TestModels(unittest.TestCase):
         self.assertIsNotNone(queried_post)
         self.assertEqual(queried_post.content, 'This is a test post content')
         self.assertEqual(queried_post.user_id, user.id)
+
+    def test_password_hashing_pool(self):
+        """Test password hashing through the process pool."""
+        self.app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+        hashing.start_executor(max_workers=1)
+        try:
+            user = User(username='pool_user', email='pool@example.com', password='secret')
+            self.assertTrue(user.password_hash.startswith('pbkdf2:sha256:2000$'))
+            self.assertTrue(user.check_password('secret'))
+            self.assertFalse(user.check_password('wrong'))
+        finally:
+            hashing.shutdown_executor()
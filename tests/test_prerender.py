@@ -0,0 +1,100 @@
+import base64
+import os
+import shutil
+import tempfile
+import unittest
+from flask_caching import make_template_fragment_key
+from app import cache, create_app, db
+from app.compression import brotli
+from app.models import User
+from app.prerender import page_file, prerender
+
+def get_auth_headers(username, password):
+    """Generate Basic Auth headers for testing."""
+    credentials = base64.b64encode(f'{username}:{password}'.encode()).decode('utf-8')
+    return {'Authorization': f'Basic {credentials}'}
+
+class TestPrerender(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment."""
+        self.app = create_app('testing')
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.app.config['PRERENDER_FOLDER'] = self.directory
+
+    def test_page_file(self):
+        """Test that page paths map to the files nginx looks for."""
+        self.assertEqual(page_file('/p', '/'), os.path.join('/p', 'index.html'))
+        self.assertEqual(page_file('/p', '/api/docs'), os.path.join('/p', 'api', 'docs.html'))
+
+    def test_prerender(self):
+        """Test that pages are written as an anonymous visitor sees them."""
+        written = prerender(self.app, self.app.config['PRERENDER_PAGES'], self.directory)
+        self.assertEqual(written, [os.path.join(self.directory, 'index.html'),
+                                   os.path.join(self.directory, 'about.html'),
+                                   os.path.join(self.directory, 'api', 'docs.html')])
+        with open(written[0]) as f:
+            page = f.read()
+        self.assertIn('Welcome to Flask Web App', page)
+        self.assertIn('Login', page)
+        self.assertNotIn('Logout', page)
+
+    def test_prerender_command(self):
+        """Test that the command also writes compressed copies."""
+        result = self.app.test_cli_runner().invoke(args=['prerender'])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, 'about.html.gz')))
+        if brotli is not None:
+            self.assertTrue(os.path.exists(os.path.join(self.directory, 'about.html.br')))
+
+    def test_failed_page(self):
+        """Test that a page that does not render is reported."""
+        with self.assertRaises(RuntimeError):
+            prerender(self.app, ['main.dashboard'], self.directory)
+
+class TestFragmentCache(unittest.TestCase):
+    def setUp(self):
+        """Set up test environment; requests run in their own app contexts."""
+        self.app = create_app('testing')
+        self.app.config['WTF_CSRF_ENABLED'] = False
+        self.app.config['CACHE_TYPE'] = 'SimpleCache'
+        cache.init_app(self.app)
+        with self.app.app_context():
+            db.create_all()
+            db.session.add(User(username='admin', email='admin@example.com',
+                                password='adminpassword', is_admin=True))
+            db.session.add(User(username='user', email='user@example.com',
+                                password='userpassword'))
+            db.session.commit()
+        self.client = self.app.test_client()
+        self.client.post('/auth/login', data={'email': 'user@example.com',
+                                              'password': 'userpassword'})
+
+    def tearDown(self):
+        """Clean up after tests."""
+        with self.app.app_context():
+            cache.clear()
+            db.drop_all()
+
+    def test_fragments_cached_per_user(self):
+        """Test that fragments are cached per user and not shown to others."""
+        self.assertIn(b'Welcome, user', self.client.get('/dashboard').data)
+        with self.app.app_context():
+            self.assertIsNotNone(cache.get(make_template_fragment_key('navbar', ['2.1'])))
+            self.assertIsNotNone(cache.get(make_template_fragment_key('dashboard', ['2.1'])))
+        page = self.app.test_client().get('/auth/login').data
+        self.assertIn(b'Register', page)
+        self.assertNotIn(b'Welcome, user', page)
+
+    def test_update_renders_again(self):
+        """Test that fragments showing a user change with the user."""
+        self.client.get('/dashboard')
+        response = self.client.put('/api/v1/users/2', json={'username': 'renamed'},
+                                   headers=get_auth_headers('admin', 'adminpassword'))
+        self.assertEqual(response.status_code, 200)
+        page = self.client.get('/dashboard').data
+        self.assertIn(b'Welcome, renamed', page)
+        self.assertIn(b'<strong>Username:</strong> renamed', page)
+
+if __name__ == '__main__':
+    unittest.main()
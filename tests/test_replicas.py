@@ -0,0 +1,113 @@
+import base64
+import os
+import shutil
+import tempfile
+import unittest
+from flask import g
+from app import cache, create_app, db
+from app.models import Post, User
+from config import TestingConfig, config
+
+def get_auth_headers(username, password):
+    """Generate Basic Auth headers for testing."""
+    credentials = base64.b64encode(f'{username}:{password}'.encode()).decode('utf-8')
+    return {'Authorization': f'Basic {credentials}'}
+
+class TestReplicaRouting(unittest.TestCase):
+    def setUp(self):
+        """Set up a primary and a replica database with different contents."""
+        self.directory = tempfile.mkdtemp()
+        self.app = self.create_app()
+        self.app_context = self.app.app_context()
+        self.app_context.push()
+        self.client = self.app.test_client()
+
+        self.replica = self.app.extensions['replica_router'].replicas[0]
+        db.create_all()
+        db.metadata.create_all(self.replica.engine)
+        db.session.add(User(username='testuser', email='test@example.com', password='password'))
+        db.session.add(Post(title='Primary post', content='Only on the primary', user_id=1))
+        db.session.commit()
+        with self.replica.engine.begin() as connection:
+            connection.execute(User.__table__.insert(), {
+                'id': 1, 'username': 'testuser', 'email': 'test@example.com', 'version': 1})
+            connection.execute(Post.__table__.insert(), {
+                'id': 1, 'title': 'Replica post', 'content': 'Only on the replica',
+                'user_id': 1, 'version': 1})
+        db.session.remove()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.replica.engine.dispose()
+        self.app_context.pop()
+        shutil.rmtree(self.directory)
+
+    def create_app(self, **overrides):
+        """Create an app whose replica is a separate SQLite database."""
+        url = lambda name: 'sqlite:///' + os.path.join(self.directory, name)
+        config['testing-replicas'] = type('ReplicaTestingConfig', (TestingConfig,), {
+            'SQLALCHEMY_DATABASE_URI': url('primary.db'),
+            'DATABASE_REPLICA_URLS': [url('replica.db')],
+            **overrides
+        })
+        return create_app('testing-replicas')
+
+    def test_reads_go_to_replica(self):
+        """Test that GET requests read from the replica."""
+        response = self.client.get('/api/v1/posts/1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['title'], 'Replica post')
+
+    def test_writes_stick_to_primary(self):
+        """Test that writes go to the primary and the client then reads from it."""
+        response = self.client.post('/api/v1/posts', json={
+            'title': 'New post', 'content': 'Written', 'user_id': 1
+        }, headers=get_auth_headers('testuser', 'password'))
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('db_primary=1', response.headers['Set-Cookie'])
+
+        # The client now carries the cookie and sees its own write
+        response = self.client.get('/api/v1/posts/2')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['title'], 'New post')
+        self.assertEqual(self.client.get('/api/v1/posts/1').get_json()['title'], 'Primary post')
+
+    def test_lagging_replica_falls_back_to_primary(self):
+        """Test that replicas beyond the maximum lag are not used."""
+        self.app.extensions['replica_router'].max_lag = -1
+        response = self.client.get('/api/v1/posts/1')
+        self.assertEqual(response.get_json()['title'], 'Primary post')
+
+    def test_unhealthy_replica_falls_back_to_primary(self):
+        """Test that a replica failing its health check is not used."""
+        os.remove(os.path.join(self.directory, 'replica.db'))
+        os.mkdir(os.path.join(self.directory, 'replica.db'))  # Can no longer be opened
+        self.replica.engine.dispose()
+        self.app.extensions['replica_router'].refresh(force=True)
+        self.assertFalse(self.replica.healthy)
+
+        response = self.client.get('/api/v1/posts/1')
+        self.assertEqual(response.get_json()['title'], 'Primary post')
+
+    def test_replica_reads_not_cached(self):
+        """Test that responses read from a replica are kept out of the response cache."""
+        self.app.config['CACHE_TYPE'] = 'SimpleCache'
+        cache.init_app(self.app)
+        self.addCleanup(cache.clear)
+
+        def first_title():
+            title = self.client.get('/api/v1/posts').get_json()['items'][0]['title']
+            # Requests share the test's app context; give the next one a fresh
+            # session and g, as it would have in a server
+            db.session.remove()
+            g.pop('db_replica_read', None)
+            return title
+
+        self.assertEqual(first_title(), 'Replica post')
+        # Read from the primary once the replica lags too far; that is cached
+        self.app.extensions['replica_router'].max_lag = -1
+        self.assertEqual(first_title(), 'Primary post')
+        with db.engine.begin() as connection:
+            connection.execute(Post.__table__.update().values(title='Changed directly'))
+        self.assertEqual(first_title(), 'Primary post')
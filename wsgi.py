@@ -0,0 +1,10 @@
+"""
+WSGI entry point for production servers.
+
+Usage:
+    gunicorn --config gunicorn_config.py wsgi:app
+"""
+import os
+from app import create_app
+
+app = create_app(os.getenv('FLASK_CONFIG', 'default'))